@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth import get_user_model
-from .models import Team, Retrospective, RetrospectiveItem, ActionItem
+from .models import Team, Retrospective, RetrospectiveItem, ActionItem, GenAIJob
 
 User = get_user_model()
 
@@ -49,4 +49,11 @@ class ActionItemAdmin(admin.ModelAdmin):
     list_display = ['title', 'retrospective', 'assigned_to', 'status', 'priority', 'due_date']
     list_filter = ['status', 'priority', 'due_date']
     search_fields = ['title', 'description']
-    ordering = ['-created_at'] 
\ No newline at end of file
+    ordering = ['-created_at'] 
+
+
+@admin.register(GenAIJob)
+class GenAIJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'retrospective', 'status', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    ordering = ['-created_at']
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'api' 
\ No newline at end of file
+    name = 'api'
+
+    def ready(self):
+        from api import signals  # noqa: F401
+
+        # Optionally load sentence transformers up front so the first clustering
+        # request doesn't pay the model load time
+        warmup_models = getattr(settings, 'SENTENCE_TRANSFORMER_WARMUP', [])
+        if warmup_models:
+            from api.services.model_registry import sentence_transformer_registry
+            sentence_transformer_registry.warm_up(warmup_models)
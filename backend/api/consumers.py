@@ -0,0 +1,37 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from api.models import Retrospective
+from api.services.board_events import board_group_name
+
+
+class BoardConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes the changes of one retrospective's board to a client that has it open.
+
+    The socket is receive-only: changes are still made through the REST API,
+    which broadcasts them (see api.services.board_events).
+    """
+
+    group_name = None
+
+    async def connect(self):
+        retrospective_id = int(self.scope['url_route']['kwargs']['retrospective_id'])
+        if not await database_sync_to_async(Retrospective.objects.filter(id=retrospective_id).exists)():
+            await self.close()
+            return
+
+        self.group_name = board_group_name(retrospective_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.group_name is not None:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Lets clients check the connection is still alive
+        if isinstance(content, dict) and content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def board_event(self, event):
+        await self.send_json(event['payload'])
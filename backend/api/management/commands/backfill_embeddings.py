@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from api.models import ItemEmbedding, RetrospectiveItem
+from api.schemas import DEFAULT_SENTENCE_TRANSFORMER
+from api.services.cluster_retroitems import ClusteringService
+from api.services.embedding_store import content_hash
+
+
+class Command(BaseCommand):
+    help = 'Encode and cache embeddings for all retrospective items that are not cached yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--transformer',
+            type=str,
+            default=DEFAULT_SENTENCE_TRANSFORMER,
+            help=f'SentenceTransformer model name (default: {DEFAULT_SENTENCE_TRANSFORMER})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=256,
+            help='Number of items to look up and encode per batch (default: 256)'
+        )
+        parser.add_argument(
+            '--retrospective',
+            type=int,
+            action='append',
+            dest='retrospective_ids',
+            help='Only backfill items of this retrospective (can be repeated)'
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete cached embeddings whose content no longer belongs to any item'
+        )
+
+    def handle(self, *args, **options):
+        transformer = options['transformer']
+        batch_size = options['batch_size']
+        store = ClusteringService(transformer=transformer).embedding_store
+
+        items = RetrospectiveItem.objects.all()
+        if options['retrospective_ids']:
+            items = items.filter(retrospective_id__in=options['retrospective_ids'])
+        contents = list(items.values_list('content', flat=True).distinct())
+
+        cached_before = ItemEmbedding.objects.filter(transformer=transformer).count()
+        for start in range(0, len(contents), batch_size):
+            store.get_embeddings(contents[start:start + batch_size])
+            self.stdout.write(f'  Processed {min(start + batch_size, len(contents))}/{len(contents)} contents')
+        cached_after = ItemEmbedding.objects.filter(transformer=transformer).count()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Encoded {cached_after - cached_before} new embeddings with "{transformer}" '
+                f'({len(contents)} distinct contents)'
+            )
+        )
+
+        if options['prune']:
+            live_hashes = {
+                content_hash(content)
+                for content in RetrospectiveItem.objects.values_list('content', flat=True).distinct()
+            }
+            stale_ids = [
+                embedding_id
+                for embedding_id, digest in ItemEmbedding.objects.filter(
+                    transformer=transformer
+                ).values_list('id', 'content_hash')
+                if digest not in live_hashes
+            ]
+            for start in range(0, len(stale_ids), batch_size):
+                ItemEmbedding.objects.filter(id__in=stale_ids[start:start + batch_size]).delete()
+            self.stdout.write(self.style.WARNING(f'Pruned {len(stale_ids)} stale embeddings'))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Retrospective
+from api.schemas import DEFAULT_SENTENCE_TRANSFORMER, DEFAULT_ENCODE_BATCH_SIZE, DEFAULT_CLUSTERING_ENGINE
+from api.services.cluster_retroitems import ClusteringService
+from api.services.clustering_engines import CLUSTERING_ENGINES
+
+
+class Command(BaseCommand):
+    help = 'Re-cluster the items of many retrospectives in one batched job'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retrospective',
+            type=int,
+            action='append',
+            dest='retrospective_ids',
+            help='Cluster this retrospective (can be repeated)'
+        )
+        parser.add_argument(
+            '--team',
+            type=str,
+            help='Cluster all retrospectives of the team with this name'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Cluster all retrospectives'
+        )
+        parser.add_argument(
+            '--transformer',
+            type=str,
+            default=DEFAULT_SENTENCE_TRANSFORMER,
+            help=f'SentenceTransformer model name (default: {DEFAULT_SENTENCE_TRANSFORMER})'
+        )
+        parser.add_argument(
+            '--engine',
+            type=str,
+            choices=sorted(CLUSTERING_ENGINES),
+            default=DEFAULT_CLUSTERING_ENGINE,
+            help=f'Clustering engine (default: {DEFAULT_CLUSTERING_ENGINE})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_ENCODE_BATCH_SIZE,
+            help=f'Number of items encoded per transformer batch (default: {DEFAULT_ENCODE_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        retrospectives = Retrospective.objects.all()
+        if options['retrospective_ids']:
+            retrospectives = retrospectives.filter(id__in=options['retrospective_ids'])
+        if options['team']:
+            retrospectives = retrospectives.filter(team__name=options['team'])
+        if not (options['retrospective_ids'] or options['team'] or options['all']):
+            raise CommandError('Pass --retrospective, --team or --all')
+
+        retrospective_ids = list(retrospectives.values_list('id', flat=True))
+        service = ClusteringService(
+            transformer=options['transformer'],
+            batch_size=options['batch_size'],
+            engine=options['engine'],
+        )
+        cluster_counts = service.cluster_retrospectives(retrospective_ids)
+
+        for retrospective_id, categories in cluster_counts.items():
+            summary = ', '.join(
+                f'{category}: {len(counts)} clusters' for category, counts in categories.items()
+            )
+            self.stdout.write(f'  Retrospective {retrospective_id}: {summary}')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Clustered {len(cluster_counts)} of {len(retrospective_ids)} retrospectives')
+        )
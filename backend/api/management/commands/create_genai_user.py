@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from api.services.generate_actionitems import GENAI_SERVICE_USERNAME
 
 User = get_user_model()
 
@@ -11,8 +12,8 @@ class Command(BaseCommand):
         parser.add_argument(
             '--username',
             type=str,
-            default='gen_ai_serviceuser',
-            help='Username for the GenAI service user (default: gen_ai_serviceuser)'
+            default=GENAI_SERVICE_USERNAME,
+            help=f'Username for the GenAI service user (default: {GENAI_SERVICE_USERNAME})'
         )
         parser.add_argument(
             '--email',
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:33
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_retrospectiveitem_cluster_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transformer', models.CharField(help_text='SentenceTransformer model name', max_length=255)),
+                ('content_hash', models.CharField(help_text='SHA-256 of the item content', max_length=64)),
+                ('dimensions', models.PositiveIntegerField()),
+                ('vector', models.BinaryField(help_text='float32 vector packed as bytes')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='itemembedding',
+            constraint=models.UniqueConstraint(fields=('transformer', 'content_hash'), name='unique_embedding_per_transformer'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_itemembedding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenAIJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='genai_jobs', to=settings.AUTH_USER_MODEL)),
+                ('retrospective', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='genai_jobs', to='api.retrospective')),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_genaijob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='actionitem',
+            index=models.Index(fields=['created_at', 'id'], name='actionitem_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='retrospectiveitem',
+            index=models.Index(fields=['created_at', 'id'], name='retroitem_created_id_idx'),
+        ),
+    ]
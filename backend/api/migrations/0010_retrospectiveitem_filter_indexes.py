@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_created_at_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='retrospectiveitem',
+            index=models.Index(fields=['retrospective', 'category', 'id'], name='retroitem_retro_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='retrospectiveitem',
+            index=models.Index(fields=['retrospective', 'created_at', 'id'], name='retroitem_retro_created_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_retrospectiveitem_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('item', 'Retrospective item'), ('action_item', 'Action item')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('revision', models.PositiveBigIntegerField(help_text='Retrospective revision of the delete')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='actionitem',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, help_text='Retrospective revision of the last write'),
+        ),
+        migrations.AddField(
+            model_name='retrospective',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, help_text="Bumped on every write to the retrospective's items and action items, and to the team and users it shows"),
+        ),
+        migrations.AddField(
+            model_name='retrospectiveitem',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, help_text='Retrospective revision of the last write'),
+        ),
+        migrations.AddIndex(
+            model_name='actionitem',
+            index=models.Index(fields=['retrospective', 'revision'], name='actionitem_retro_revision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='retrospectiveitem',
+            index=models.Index(fields=['retrospective', 'revision'], name='retroitem_retro_revision_idx'),
+        ),
+        migrations.AddField(
+            model_name='deletedrow',
+            name='retrospective',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deleted_rows', to='api.retrospective'),
+        ),
+        migrations.AddIndex(
+            model_name='deletedrow',
+            index=models.Index(fields=['retrospective', 'revision'], name='deletedrow_retro_revision_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_board_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='retrospective',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Last write to the retrospective, its items, its action items, or its team and users'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_retrospective_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='retrospectiveitem',
+            name='cluster_id',
+            field=models.IntegerField(blank=True, help_text='Cluster ID, null until the item is clustered', null=True),
+        ),
+    ]
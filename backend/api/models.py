@@ -1,7 +1,15 @@
-from django.db import models
+from typing import Dict, Iterable, Tuple, Union
+
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery
 from django.contrib.auth.models import AbstractUser
+from django.dispatch import Signal
 from django.utils import timezone
 
+# Sent by Retrospective.objects.bump_revisions with ``statuses``, a dict of the
+# status of each retrospective whose revision was bumped
+revisions_bumped = Signal()
+
 
 class User(AbstractUser):
     """Custom user model for the retrospective tool."""
@@ -29,6 +37,45 @@ class Team(models.Model):
         return self.name
 
 
+class RetrospectiveManager(models.Manager):
+    def bump_revisions(self, retrospective_ids: Union[Iterable[int], models.QuerySet]) -> Dict[int, int]:
+        """Increment the revision of each retrospective and return the new values.
+
+        ``retrospective_ids`` may also be a queryset of ids, which is run as a
+        subquery. The UPDATE holds the retrospectives' rows until the
+        surrounding transaction ends, so writes to a board commit in revision
+        order; board writes run in short transactions of their own. It also
+        moves updated_at to now and sends revisions_bumped.
+        """
+        if not isinstance(retrospective_ids, models.QuerySet):
+            retrospective_ids = sorted(set(retrospective_ids))
+            if not retrospective_ids:
+                return {}
+
+        retrospectives = self.filter(id__in=retrospective_ids)
+        with transaction.atomic(using=self.db, savepoint=False):
+            if not retrospectives.update(revision=F('revision') + 1, updated_at=timezone.now()):
+                return {}
+            # Read back under the row locks the UPDATE took, so these are this write's revisions
+            rows = list(retrospectives.values_list('id', 'revision', 'status'))
+
+        revisions_bumped.send(sender=self.model, statuses={retrospective_id: status for retrospective_id, _, status in rows})
+        return {retrospective_id: revision for retrospective_id, revision, _ in rows}
+
+    def ids_showing_user(self, user_id: int) -> set:
+        """Ids of the retrospectives whose full payload renders the user.
+
+        That is as a team member, the creator, a card author or an assignee.
+        """
+        return set(
+            self.filter(team__members=user_id).values_list('id', flat=True).union(
+                self.filter(created_by=user_id).values_list('id', flat=True),
+                RetrospectiveItem.objects.filter(author=user_id).values_list('retrospective_id', flat=True),
+                ActionItem.objects.filter(assigned_to=user_id).values_list('retrospective_id', flat=True),
+            )
+        )
+
+
 class Retrospective(models.Model):
     """Retrospective session model."""
     STATUS_CHOICES = [
@@ -44,12 +91,92 @@ class Retrospective(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(default=timezone.now)
     completed_at = models.DateTimeField(null=True, blank=True)
+    revision = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Bumped on every write to the retrospective's items and action items, "
+                  "and to the team and users it shows",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, help_text="Last write to the retrospective, its items, its action items, or its team and users"
+    )
+
+    objects = RetrospectiveManager()
+
+    def save(self, *args, **kwargs):
+        # The revision is only ever incremented in the database; don't write back a stale copy
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'revision'
+            ]
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.title
 
 
-class RetrospectiveItem(models.Model):
+class BoardRowQuerySet(models.QuerySet):
+    """Writes through this queryset bump the revision of the retrospectives they touch."""
+
+    def update(self, **kwargs):
+        # An explicit revision means the caller already bumped it (see bulk_update)
+        if 'revision' in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            Retrospective.objects.bump_revisions(self.values('retrospective_id'))
+            kwargs['revision'] = Subquery(
+                Retrospective.objects.filter(pk=OuterRef('retrospective_id')).values('revision')[:1]
+            )
+            return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            revisions = Retrospective.objects.bump_revisions(obj.retrospective_id for obj in objs)
+            for obj in objs:
+                obj.revision = revisions.get(obj.retrospective_id, 0)
+            return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            revisions = Retrospective.objects.bump_revisions(obj.retrospective_id for obj in objs)
+            for obj in objs:
+                obj.revision = revisions.get(obj.retrospective_id, 0)
+            return super().bulk_update(objs, [*fields, 'revision'], *args, **kwargs)
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            DeletedRow.objects.record(self.model, self.values_list('retrospective_id', 'id'))
+            return super().delete()
+
+
+class BoardRow(models.Model):
+    """A row of a retrospective's board, synced to clients by revision.
+
+    Every write stamps the row with its retrospective's new revision and
+    deletes leave a DeletedRow behind, so clients can ask for everything that
+    changed after the revision they last saw.
+    """
+    revision = models.PositiveBigIntegerField(default=0, help_text="Retrospective revision of the last write")
+
+    objects = BoardRowQuerySet.as_manager()
+
+    # DeletedRow.kind of deleted rows
+    tombstone_kind = None
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            self.revision = Retrospective.objects.bump_revisions([self.retrospective_id]).get(self.retrospective_id, 0)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'revision'}
+            super().save(*args, **kwargs)
+
+
+class RetrospectiveItem(BoardRow):
     """Individual items in a retrospective."""
     CATEGORY_CHOICES = [
         ('start', 'Start'),
@@ -63,18 +190,31 @@ class RetrospectiveItem(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)
-    cluster_id = models.IntegerField(default=0, help_text="Cluster ID")
+    cluster_id = models.IntegerField(null=True, blank=True, help_text="Cluster ID, null until the item is clustered")
     x_minimized = models.IntegerField(default=0, help_text="X coordinate for minimized square")
     y_minimized = models.IntegerField(default=0, help_text="Y coordinate for minimized square")
     x_maximized = models.IntegerField(default=0, help_text="X coordinate for maximized square")
     y_maximized = models.IntegerField(default=0, help_text="Y coordinate for maximized square")
     created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Cursor pagination order
+            models.Index(fields=['created_at', 'id'], name='retroitem_created_id_idx'),
+            # One board column in id order (clustering), and one board in page order
+            models.Index(fields=['retrospective', 'category', 'id'], name='retroitem_retro_category_idx'),
+            models.Index(fields=['retrospective', 'created_at', 'id'], name='retroitem_retro_created_idx'),
+            # Changes of one board since a revision
+            models.Index(fields=['retrospective', 'revision'], name='retroitem_retro_revision_idx'),
+        ]
+
+    tombstone_kind = 'item'
     
     def __str__(self):
         return f"{self.category}: {self.content[:50]}"
 
 
-class ActionItem(models.Model):
+class ActionItem(BoardRow):
     """Action items from retrospectives."""
     STATUS_CHOICES = [
         ('open', 'Open'),
@@ -97,6 +237,96 @@ class ActionItem(models.Model):
     due_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Cursor pagination order
+            models.Index(fields=['created_at', 'id'], name='actionitem_created_id_idx'),
+            # Changes of one board since a revision
+            models.Index(fields=['retrospective', 'revision'], name='actionitem_retro_revision_idx'),
+        ]
+
+    tombstone_kind = 'action_item'
     
     def __str__(self):
-        return self.title 
\ No newline at end of file
+        return self.title
+
+
+class DeletedRowManager(models.Manager):
+    def record(self, model, rows: Iterable[Tuple[int, int]]) -> None:
+        """Leave a tombstone for each deleted (retrospective id, row id) of ``model``."""
+        rows = list(rows)
+        revisions = Retrospective.objects.bump_revisions(retrospective_id for retrospective_id, _ in rows)
+        self.bulk_create([
+            self.model(
+                retrospective_id=retrospective_id,
+                kind=model.tombstone_kind,
+                object_id=object_id,
+                revision=revisions[retrospective_id],
+            )
+            for retrospective_id, object_id in rows
+            if retrospective_id in revisions
+        ])
+
+
+class DeletedRow(models.Model):
+    """Tombstone of a deleted retrospective item or action item, for delta sync."""
+    KIND_CHOICES = [
+        ('item', 'Retrospective item'),
+        ('action_item', 'Action item'),
+    ]
+
+    retrospective = models.ForeignKey(Retrospective, on_delete=models.CASCADE, related_name='deleted_rows')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    revision = models.PositiveBigIntegerField(help_text="Retrospective revision of the delete")
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    objects = DeletedRowManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['retrospective', 'revision'], name='deletedrow_retro_revision_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id} (revision {self.revision})"
+
+
+class ItemEmbedding(models.Model):
+    """Cached sentence embedding of retrospective item content."""
+    transformer = models.CharField(max_length=255, help_text="SentenceTransformer model name")
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the item content")
+    dimensions = models.PositiveIntegerField()
+    vector = models.BinaryField(help_text="float32 vector packed as bytes")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['transformer', 'content_hash'], name='unique_embedding_per_transformer'),
+        ]
+
+    def __str__(self):
+        return f"{self.transformer}: {self.content_hash[:12]}"
+
+
+class GenAIJob(models.Model):
+    """Background job generating action items for a retrospective."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    retrospective = models.ForeignKey(Retrospective, on_delete=models.CASCADE, related_name='genai_jobs')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='genai_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"GenAI job {self.pk} ({self.status})"
@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Oldest first, paged by an opaque cursor on (created_at, id).
+
+    Unlike page numbers this needs no COUNT(*) and no OFFSET scan, so every
+    page costs the same however deep it is. Backed by a (created_at, id) index.
+    """
+    ordering = ('created_at', 'id')
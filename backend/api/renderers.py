@@ -0,0 +1,28 @@
+import json
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def format_sse_event(event: str, data, event_id=None) -> str:
+    """Format one Server-Sent Event with a JSON payload.
+
+    ``event_id`` is what a reconnecting EventSource sends back as Last-Event-ID.
+    """
+    id_line = f"id: {event_id}\n" if event_id is not None else ''
+    return f"event: {event}\n{id_line}data: {json.dumps(data, cls=JSONEncoder)}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets streaming endpoints accept ``text/event-stream``.
+
+    Successful responses are streamed by the view itself; this renderer only
+    renders regular (error) responses, as a single ``error`` event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return format_sse_event('error', data).encode(self.charset)
@@ -32,6 +32,12 @@ DEFAULT_OLLAMA_HOST = '127.0.0.1:11434'
 DEFAULT_AI_MODEL = 'mistral'
 DEFAULT_SENTENCE_TRANSFORMER = 'all-MiniLM-L6-v2'
 
+# Clustering Configuration
+DEFAULT_CLUSTERING_ENGINE = 'dbscan'
+DEFAULT_CLUSTER_EPS = 1.1
+DEFAULT_CLUSTER_DRIFT_THRESHOLD = 0.25
+DEFAULT_ENCODE_BATCH_SIZE = 64
+
 # System Prompts
 SYSTEM_PROMPT_GENERATE_ACTIONS = '''
 You are a team leader for an agile retrospective.
@@ -47,12 +53,30 @@ class RetroItem(TypedDict):
 - Output only valid JSON: a list of RetroItems.
 - Output in the same language as the retro items.
 - Group similar items together into a single item.
+- An item ending with (xN) stands for N similar cards; weigh it accordingly.
 - Items MUST be based on the retro items provided.
 - Limit output to maximum 7 items, but fewer are ok.
 - Produce a list of new RetroItems.
 - It should be possible to parse the output using json.loads(response.message.content)
 '''
 
+SYSTEM_PROMPT_SUMMARIZE_ITEMS = '''
+You are a team leader for an agile retrospective.
+Summarize the retrospective cards provided into their main themes.
+
+Rules:
+- RetroItem is a TypedDict defined as:
+class RetroItem(TypedDict):
+    content: str
+    category: str
+- category is the category of the cards provided, in lower case.
+- Output only valid JSON: a list of RetroItems, one per theme.
+- Output in the same language as the retro items.
+- A card ending with (xN) stands for N similar cards; weigh it accordingly.
+- Keep each theme to a single sentence.
+- Limit output to maximum 7 items, but fewer are ok.
+'''
+
 # Retrospective Categories
 RETROSPECTIVE_CATEGORIES = [
     'start',
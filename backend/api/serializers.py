@@ -1,11 +1,48 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Team, Retrospective, RetrospectiveItem, ActionItem
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from .models import Team, Retrospective, RetrospectiveItem, ActionItem, GenAIJob
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """Trims and collapses fields based on the ``fields``, ``omit`` and ``expand`` context.
+
+    ``fields`` and ``omit`` are lists of top-level field names to keep or drop.
+    When ``expand`` is a list, nested serializers not named in it are rendered
+    as primary keys; when it is None they stay nested.
+
+    ``related_lookups`` maps each nested field to the select_related and
+    prefetch_related lookups it needs, and ``annotations`` maps fields to the
+    queryset annotations they read, so views only join what is rendered.
+    """
+    related_lookups = {}
+    annotations = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the serializer a view instantiates gets a context here, not nested ones
+        fields = self.context.get('fields')
+        omit = self.context.get('omit')
+        expand = self.context.get('expand')
+
+        nested = {name for name, field in self.fields.items() if isinstance(field, serializers.BaseSerializer)}
+        for param, names, allowed in (('fields', fields, self.fields), ('omit', omit, self.fields), ('expand', expand, nested)):
+            unknown = set(names or ()) - set(allowed)
+            if unknown:
+                raise serializers.ValidationError({param: f"Unknown field(s): {', '.join(sorted(unknown))}"})
+
+        for name in list(self.fields):
+            if (fields is not None and name not in fields) or (omit and name in omit):
+                self.fields.pop(name)
+            elif expand is not None and name in nested and name not in expand:
+                many = isinstance(self.fields[name], serializers.ListSerializer)
+                self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many)
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'username', 'userfullname', 'role']
@@ -30,8 +67,9 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         fields = ['username', 'userfullname', 'role']
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     members = UserSerializer(many=True, read_only=True)
+    related_lookups = {'members': ((), ('members',))}
     
     class Meta:
         model = Team
@@ -45,43 +83,191 @@ class TeamCreateSerializer(serializers.ModelSerializer):
         fields = ['name', 'description']
 
 
-class RetrospectiveItemSerializer(serializers.ModelSerializer):
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that a list serializer can hand the rows of all its keys at once.
+
+    While ``preloaded`` maps primary keys to instances, keys are looked up in
+    it instead of querying the database once per row.
+    """
+    preloaded = None
+
+    def to_internal_value(self, data):
+        if self.preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.preloaded:
+            self.fail('does_not_exist', pk_value=data)
+        return self.preloaded[pk]
+
+
+class RetrospectiveItemListSerializer(serializers.ListSerializer):
+    """Saves many items with a single bulk_create or bulk_update.
+
+    The retrospectives of created items are validated with one query, not one per item.
+    """
+
+    def to_internal_value(self, data):
+        field = self.child.fields.get('retrospective')
+        if not isinstance(field, PreloadedPrimaryKeyRelatedField) or not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        ids = set()
+        for row in data:
+            value = row.get('retrospective') if isinstance(row, dict) else None
+            if not isinstance(value, bool) and isinstance(value, (int, str)) and str(value).isdigit():
+                ids.add(int(value))
+        field.preloaded = field.get_queryset().in_bulk(ids)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            field.preloaded = None
+
+    def create(self, validated_data):
+        return RetrospectiveItem.objects.bulk_create([RetrospectiveItem(**attrs) for attrs in validated_data])
+
+    def update(self, instances, validated_data):
+        """Apply partial updates; ``instances`` maps item id to item, and every update carries its id."""
+        items = []
+        changed_fields = set()
+        for attrs in validated_data:
+            item = instances[attrs['id']]
+            for field, value in attrs.items():
+                if field != 'id':
+                    setattr(item, field, value)
+                    changed_fields.add(field)
+            items.append(item)
+        if changed_fields:
+            RetrospectiveItem.objects.bulk_update(items, sorted(changed_fields), batch_size=len(items))
+        return items
+
+
+class RetrospectiveItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    retrospective = PreloadedPrimaryKeyRelatedField(queryset=Retrospective.objects.all())
     author = UserSerializer(read_only=True)
+    related_lookups = {'author': (('author',), ())}
     
     class Meta:
         model = RetrospectiveItem
-        fields = ['id', 'retrospective', 'category', 'content', 'author', 'x_minimized', 'y_minimized', 'x_maximized', 'y_maximized', 'created_at']
-        read_only_fields = ['id', 'author', 'created_at']
+        fields = ['id', 'retrospective', 'category', 'content', 'author', 'cluster_id', 'x_minimized', 'y_minimized', 'x_maximized', 'y_maximized', 'created_at', 'revision']
+        read_only_fields = ['id', 'author', 'created_at', 'revision']
+        list_serializer_class = RetrospectiveItemListSerializer
+
+
+class RetrospectiveItemBulkUpdateSerializer(serializers.ModelSerializer):
+    """Partial update of one item in a bulk request: its position, category or cluster."""
+    id = serializers.IntegerField()
+
+    class Meta:
+        model = RetrospectiveItem
+        fields = ['id', 'category', 'cluster_id', 'x_minimized', 'y_minimized', 'x_maximized', 'y_maximized']
+        extra_kwargs = {field: {'required': False} for field in fields if field != 'id'}
+        list_serializer_class = RetrospectiveItemListSerializer
 
 
-class ActionItemSerializer(serializers.ModelSerializer):
+class ItemPositionSerializer(serializers.Serializer):
+    """Coordinates of a card being dragged; at least one is required."""
+    x_minimized = serializers.IntegerField(required=False)
+    y_minimized = serializers.IntegerField(required=False)
+    x_maximized = serializers.IntegerField(required=False)
+    y_maximized = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(f"Provide at least one of: {', '.join(self.fields)}")
+        return attrs
+
+
+class ActionItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     assigned_to = UserSerializer(read_only=True)
+    related_lookups = {'assigned_to': (('assigned_to',), ())}
     
     class Meta:
         model = ActionItem
         fields = [
             'id', 'retrospective', 'title', 'description', 'assigned_to',
-            'status', 'priority', 'due_date', 'created_at', 'completed_at'
+            'status', 'priority', 'due_date', 'created_at', 'completed_at', 'revision'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'revision']
 
 
-class RetrospectiveSerializer(serializers.ModelSerializer):
+class RetrospectiveSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     team = TeamSerializer(read_only=True)
     created_by = UserSerializer(read_only=True)
     items = RetrospectiveItemSerializer(many=True, read_only=True)
     action_items = ActionItemSerializer(many=True, read_only=True)
+    related_lookups = {
+        'team': (('team',), ('team__members',)),
+        'created_by': (('created_by',), ()),
+        'items': ((), (Prefetch('items', queryset=RetrospectiveItem.objects.select_related('author')),)),
+        'action_items': ((), (Prefetch('action_items', queryset=ActionItem.objects.select_related('assigned_to')),)),
+    }
     
     class Meta:
         model = Retrospective
         fields = [
             'id', 'title', 'description', 'team', 'created_by', 'status',
-            'created_at', 'completed_at', 'items', 'action_items'
+            'created_at', 'completed_at', 'updated_at', 'revision', 'items', 'action_items'
+        ]
+        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at', 'revision']
+
+
+class TeamSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Team
+        fields = ['id', 'name', 'description']
+        read_only_fields = fields
+
+
+def retrospective_row_count(model):
+    """Number of ``model`` rows of each retrospective, as a correlated subquery rather than a join."""
+    counts = (
+        model.objects.filter(retrospective=OuterRef('pk')).order_by()
+        .values('retrospective').annotate(count=Count('pk')).values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class RetrospectiveSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Retrospective without its cards, for listing many boards at once."""
+    team = TeamSummarySerializer(read_only=True)
+    created_by = UserSerializer(read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+    action_item_count = serializers.IntegerField(read_only=True)
+    related_lookups = {
+        'team': (('team',), ()),
+        'created_by': (('created_by',), ()),
+    }
+    annotations = {
+        # Two joins would multiply every board's items by its action items before counting
+        'item_count': retrospective_row_count(RetrospectiveItem),
+        'action_item_count': retrospective_row_count(ActionItem),
+    }
+
+    class Meta:
+        model = Retrospective
+        fields = [
+            'id', 'title', 'description', 'team', 'created_by', 'status',
+            'created_at', 'completed_at', 'item_count', 'action_item_count'
         ]
-        read_only_fields = ['id', 'created_by', 'created_at']
+        read_only_fields = fields
 
 
 class RetrospectiveCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Retrospective
-        fields = ['title', 'description', 'team']  # Added 'team' field back 
\ No newline at end of file
+        fields = ['title', 'description', 'team']  # Added 'team' field back 
+
+
+class GenAIJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GenAIJob
+        fields = [
+            'id', 'retrospective', 'status', 'result', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,76 @@
+"""
+Cache of rendered completed and archived retrospectives.
+
+Boards that are no longer active hardly ever change, yet every view would
+serialize them again. Their rendered JSON is kept in the "boards" Django cache
+(see CACHES in the settings) together with its ETag, so browsing history is
+served without a database query.
+
+Payloads are stored under a generation token of their retrospective. Every
+write to the retrospective, its items or its action items, and every edit of
+its team or the users it shows, drops the token and the next reader starts a
+new one, so a payload rendered before a write is never served after it, even
+if its reader stores it late. Only a shared backend drops tokens in every
+process; per-process caches rely on a short TTL instead.
+"""
+
+import uuid
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.core.cache import caches
+from django.db import transaction
+
+BOARD_CACHE_ALIAS = 'boards'
+
+
+class BoardPayloadCache:
+    """Rendered retrospectives, one entry per retrospective and request variant."""
+
+    def __init__(self, alias: str = BOARD_CACHE_ALIAS):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def generation(self, retrospective_id: int) -> str:
+        """Return the retrospective's generation token, starting a new one if there is none."""
+        key = self._generation_key(retrospective_id)
+        token = self.cache.get(key)
+        if token is None:
+            token = uuid.uuid4().hex
+            if not self.cache.add(key, token):
+                token = self.cache.get(key) or token
+        return token
+
+    def get(self, retrospective_id: int, variant: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Return the current generation token and the cached payload of ``variant``, if any."""
+        token = self.generation(retrospective_id)
+        return token, self.cache.get(self._payload_key(retrospective_id, token, variant))
+
+    def set(self, retrospective_id: int, token: str, variant: str, payload: Dict[str, Any]) -> None:
+        """Store a payload that was rendered after ``token`` was read."""
+        self.cache.set(self._payload_key(retrospective_id, token, variant), payload)
+
+    def invalidate(self, retrospective_ids: Iterable[int]) -> None:
+        """Drop the cached payloads of the retrospectives, now and once the current transaction commits."""
+        keys = [self._generation_key(retrospective_id) for retrospective_id in set(retrospective_ids)]
+        if not keys:
+            return
+        self.cache.delete_many(keys)
+        # Readers may have rendered the old board again before the write committed
+        transaction.on_commit(lambda: self.cache.delete_many(keys))
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    @staticmethod
+    def _generation_key(retrospective_id: int) -> str:
+        return f'retrospective:{retrospective_id}:generation'
+
+    @staticmethod
+    def _payload_key(retrospective_id: int, token: str, variant: str) -> str:
+        return f'retrospective:{retrospective_id}:{token}:{variant}'
+
+
+board_payload_cache = BoardPayloadCache()
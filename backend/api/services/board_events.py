@@ -0,0 +1,156 @@
+"""
+Real-time board sync.
+
+Every client with a board open joins the channel layer group of its
+retrospective (see api.consumers). Changes to the board's items are sent to
+that group as small deltas once the transaction making them has committed, so
+participants apply them in place instead of refetching the whole board.
+
+Events:
+    {"type": "item.created", "item": {...}}
+    {"type": "item.updated", "item": {...}}
+    {"type": "item.deleted", "id": 12}
+    {"type": "item.moved", "id": 12, "x_minimized": ..., ...}
+    {"type": "items.bulk", "created": [{...}, ...], "updated": [{...}, ...]}
+    {"type": "items.clustered", "clusters": {"12": 0, "13": 1, ...}}
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
+from api.models import RetrospectiveItem
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_ITEM_RETROSPECTIVES = 10000
+
+
+def board_group_name(retrospective_id: int) -> str:
+    return f'retrospective_{retrospective_id}'
+
+
+def send_board_event(retrospective_id: int, payload: Dict[str, Any]) -> None:
+    """Send ``payload`` to everyone watching the board right away."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            board_group_name(retrospective_id), {'type': 'board.event', 'payload': payload}
+        )
+    except Exception as e:
+        # Live sync is best effort; the change itself is already saved
+        logger.warning(f"Failed to broadcast {payload.get('type')} to retrospective {retrospective_id}: {e}")
+
+
+def broadcast_board_event(retrospective_id: int, payload: Union[Dict[str, Any], Callable[[], Dict[str, Any]]]) -> None:
+    """Send ``payload`` to everyone watching the board once the current transaction commits.
+
+    ``payload`` may be a function building the event, so items are only
+    serialized after a successful commit.
+    """
+    transaction.on_commit(
+        lambda: send_board_event(retrospective_id, payload() if callable(payload) else payload)
+    )
+
+
+def serialize_items(items: Iterable[RetrospectiveItem]) -> list:
+    # Imported here to avoid a circular import with api.serializers
+    from api.serializers import RetrospectiveItemSerializer
+    items = list(items)
+    prefetch_related_objects(items, 'author')
+    return RetrospectiveItemSerializer(items, many=True).data
+
+
+def broadcast_item_saved(item: RetrospectiveItem, created: bool) -> None:
+    broadcast_board_event(item.retrospective_id, lambda: {
+        'type': 'item.created' if created else 'item.updated',
+        'item': serialize_items([item])[0],
+    })
+
+
+def broadcast_item_deleted(item: RetrospectiveItem) -> None:
+    broadcast_board_event(item.retrospective_id, {'type': 'item.deleted', 'id': item.id})
+
+
+def broadcast_items_bulk(created: Iterable[RetrospectiveItem] = (), updated: Iterable[RetrospectiveItem] = ()) -> None:
+    """Broadcast items saved with bulk_create/bulk_update, which send no signals, per board."""
+    by_retrospective: Dict[int, Dict[str, list]] = {}
+    for key, items in (('created', created), ('updated', updated)):
+        for item in items:
+            item_retrospectives.remember(item.id, item.retrospective_id)
+            by_retrospective.setdefault(item.retrospective_id, {'created': [], 'updated': []})[key].append(item)
+
+    for retrospective_id, changes in by_retrospective.items():
+        broadcast_board_event(retrospective_id, lambda changes=changes: {
+            'type': 'items.bulk',
+            'created': serialize_items(changes['created']),
+            'updated': serialize_items(changes['updated']),
+        })
+
+
+def broadcast_clusters(retrospective_id: int, clusters: Dict[int, int]) -> None:
+    """Broadcast new cluster ids, as a mapping of item id to cluster id."""
+    if clusters:
+        broadcast_board_event(retrospective_id, {
+            'type': 'items.clustered',
+            'clusters': {str(item_id): cluster_id for item_id, cluster_id in clusters.items()},
+        })
+
+
+class ItemRetrospectiveCache:
+    """Bounded map of item id to retrospective id.
+
+    Position updates only know the item id; remembering the board of every
+    saved item lets them be broadcast without reading the item again.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_ITEM_RETROSPECTIVES):
+        self.max_entries = max_entries
+        self._retrospective_ids: 'OrderedDict[int, int]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, item_id: int, retrospective_id: int) -> None:
+        with self._lock:
+            self._retrospective_ids[item_id] = retrospective_id
+            self._retrospective_ids.move_to_end(item_id)
+            while len(self._retrospective_ids) > self.max_entries:
+                self._retrospective_ids.popitem(last=False)
+
+    def forget(self, item_id: int) -> None:
+        with self._lock:
+            self._retrospective_ids.pop(item_id, None)
+
+    def get(self, item_id: int) -> Optional[int]:
+        with self._lock:
+            retrospective_id = self._retrospective_ids.get(item_id)
+            if retrospective_id is not None:
+                self._retrospective_ids.move_to_end(item_id)
+                return retrospective_id
+
+        retrospective_id = RetrospectiveItem.objects.filter(pk=item_id).values_list(
+            'retrospective_id', flat=True
+        ).first()
+        if retrospective_id is not None:
+            self.remember(item_id, retrospective_id)
+        return retrospective_id
+
+    def clear(self) -> None:
+        with self._lock:
+            self._retrospective_ids.clear()
+
+
+item_retrospectives = ItemRetrospectiveCache()
+
+
+def broadcast_item_moved(item_id: int, position: Dict[str, int]) -> None:
+    retrospective_id = item_retrospectives.get(item_id)
+    if retrospective_id is not None:
+        broadcast_board_event(retrospective_id, {'type': 'item.moved', 'id': item_id, **position})
@@ -1,22 +1,154 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, QuerySet
 from api.models import Retrospective, RetrospectiveItem, User
-from sentence_transformers import SentenceTransformer
-from sklearn.cluster import DBSCAN
 import numpy.typing as npt
-from api.schemas import RetroItem, RetroItemList, DEFAULT_SENTENCE_TRANSFORMER
+from api.schemas import (
+    RetroItem, RetroItemList, DEFAULT_SENTENCE_TRANSFORMER, DEFAULT_CLUSTER_EPS, DEFAULT_CLUSTER_DRIFT_THRESHOLD,
+    DEFAULT_ENCODE_BATCH_SIZE, DEFAULT_CLUSTERING_ENGINE,
+)
+from api.services.board_events import broadcast_clusters
+from api.services.clustering_engines import ClusteringEngine, get_clustering_engine
+from api.services.embedding_store import EmbeddingStore
+from api.services.model_registry import get_sentence_transformer
+
+logger = logging.getLogger(__name__)
+
+# Number and latest revision of the labelled items of a board column
+Fingerprint = Tuple[int, Optional[int]]
+
+
+@dataclass
+class CategoryCentroids:
+    """Running cluster centroids of one (retrospective, category) board column.
+
+    Cached instances are shared between threads and never changed in place:
+    assignments work on a copy, which then replaces the cached one.
+    """
+    sums: Dict[int, npt.NDArray] = field(default_factory=dict)
+    counts: Dict[int, int] = field(default_factory=dict)
+    fitted: Dict[int, npt.NDArray] = field(default_factory=dict)
+
+    @classmethod
+    def from_labels(cls, vectors: npt.NDArray, labels) -> 'CategoryCentroids':
+        centroids = cls()
+        for vector, label in zip(vectors, labels):
+            centroids.add(int(label), vector)
+        centroids.fitted = {label: centroids.centroid(label) for label in centroids.sums}
+        return centroids
+
+    def add(self, cluster_id: int, vector: npt.NDArray) -> None:
+        if cluster_id in self.sums:
+            self.sums[cluster_id] = self.sums[cluster_id] + vector
+            self.counts[cluster_id] += 1
+        else:
+            self.sums[cluster_id] = np.array(vector, dtype=np.float32)
+            self.counts[cluster_id] = 1
+
+    def copy(self) -> 'CategoryCentroids':
+        # add() replaces arrays instead of changing them, so the arrays can be shared
+        return CategoryCentroids(sums=dict(self.sums), counts=dict(self.counts), fitted=self.fitted)
+
+    def centroid(self, cluster_id: int) -> npt.NDArray:
+        return self.sums[cluster_id] / self.counts[cluster_id]
+
+    def nearest(self, vector: npt.NDArray) -> Tuple[Optional[int], float]:
+        """Return the closest cluster id and its distance, in O(clusters)."""
+        if not self.sums:
+            return None, float('inf')
+        cluster_ids = list(self.sums)
+        centroids = np.vstack([self.centroid(cluster_id) for cluster_id in cluster_ids])
+        distances = np.linalg.norm(centroids - vector, axis=1)
+        index = int(np.argmin(distances))
+        return cluster_ids[index], float(distances[index])
+
+    def drift(self, cluster_id: int) -> float:
+        """How far a cluster's centroid has moved since the last full fit."""
+        if cluster_id not in self.fitted:
+            return 0.0
+        return float(np.linalg.norm(self.centroid(cluster_id) - self.fitted[cluster_id]))
+
+    def next_cluster_id(self) -> int:
+        return max(self.sums, default=-1) + 1
+
+
+class CentroidCache:
+    """Process-local cache of CategoryCentroids, keyed by transformer, retrospective and category.
+
+    Each entry remembers the fingerprint of the labelled items it was built
+    from. Other processes don't invalidate it, so it is only used while the
+    fingerprint read from the database still matches.
+    """
+
+    def __init__(self):
+        self._centroids: Dict[Tuple[str, int, str], Tuple[Fingerprint, CategoryCentroids]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fingerprint: Fingerprint) -> Optional[CategoryCentroids]:
+        with self._lock:
+            cached_fingerprint, centroids = self._centroids.get(key, (None, None))
+        return centroids if cached_fingerprint == fingerprint else None
+
+    def set(self, key, centroids: CategoryCentroids, fingerprint: Fingerprint) -> None:
+        with self._lock:
+            self._centroids[key] = (fingerprint, centroids)
+
+    def forget(self, retrospective_id: int, category: Optional[str] = None) -> None:
+        """Drop cached centroids of a retrospective (optionally only one category)."""
+        with self._lock:
+            for key in list(self._centroids):
+                if key[1] == retrospective_id and (category is None or key[2] == category):
+                    del self._centroids[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._centroids.clear()
+
+
+centroid_cache = CentroidCache()
+
+
+def cosine_similarity_matrix(a: npt.NDArray, b: npt.NDArray) -> npt.NDArray[np.float32]:
+    """Pairwise cosine similarities between the rows of ``a`` and the rows of ``b``."""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a_norms = np.linalg.norm(a, axis=1, keepdims=True)
+    b_norms = np.linalg.norm(b, axis=1, keepdims=True)
+    a = a / np.where(a_norms == 0, 1, a_norms)
+    b = b / np.where(b_norms == 0, 1, b_norms)
+    return a @ b.T
 
 
 class ClusteringService:
     """Service for clustering retrospective items."""
-    def __init__(self, transformer: str = DEFAULT_SENTENCE_TRANSFORMER):
-        self.transformer = SentenceTransformer(transformer)
+    def __init__(
+        self,
+        transformer: str = DEFAULT_SENTENCE_TRANSFORMER,
+        eps: float = DEFAULT_CLUSTER_EPS,
+        drift_threshold: float = DEFAULT_CLUSTER_DRIFT_THRESHOLD,
+        batch_size: int = DEFAULT_ENCODE_BATCH_SIZE,
+        engine: str = DEFAULT_CLUSTERING_ENGINE,
+    ):
+        self.transformer_name = transformer
+        self.eps = eps
+        self.drift_threshold = drift_threshold
+        self.batch_size = batch_size
+        self.engine: ClusteringEngine = get_clustering_engine(engine, threshold=eps)
+
+    @property
+    def transformer(self):
+        """Shared SentenceTransformer, loaded once per process by the model registry."""
+        return get_sentence_transformer(self.transformer_name)
     
     def get_retrospective_items(self, retrospective_id: int, category: str) -> list[RetroItem]:
         """Get all items from a retrospective."""
         try:
-            retrospective_items = RetrospectiveItem.objects.filter(
-                retrospective_id=retrospective_id,
-                category=category
-            )
+            retrospective_items = self.get_item_queryset(retrospective_id, category)
 
             return [
                 RetroItem(
@@ -29,13 +161,28 @@ class ClusteringService:
         except Retrospective.DoesNotExist:
             raise ValueError(f"Retrospective with id {retrospective_id} not found")
     
+    def get_item_queryset(self, retrospective_id: int, category: str):
+        """Items of one category, in a stable order so labels line up with rows."""
+        return RetrospectiveItem.objects.filter(
+            retrospective_id=retrospective_id,
+            category=category
+        ).order_by('id')
+
+    @property
+    def embedding_store(self) -> EmbeddingStore:
+        # The model is only loaded if some content isn't cached yet
+        return EmbeddingStore(
+            self.transformer_name,
+            lambda contents: self.transformer.encode(contents, batch_size=self.batch_size),
+        )
+
     def encode_retrospective_items(self, items: list[RetroItem]) -> npt.NDArray[float]:
-        """Transform retrospective items."""
-        return self.transformer.encode([item.content for item in items])
+        """Transform retrospective items, reusing cached embeddings where the content is unchanged."""
+        return self.embedding_store.get_embeddings([item.content for item in items])
     
-    def find_clusters(self, items: npt.NDArray[float]) -> DBSCAN:
+    def find_clusters(self, items: npt.NDArray[float]) -> npt.NDArray[int]:
         """Fit cluster model."""
-        return DBSCAN(eps=1.1, min_samples=1).fit(items).labels_
+        return self.engine.fit_predict(items)
     
     def cluster_retrospective_items(self, retrospective_id: int, category: str):
         """Cluster retrospective items."""
@@ -43,4 +190,216 @@ class ClusteringService:
         items_encoded = self.encode_retrospective_items(items)
         cluster_ids = self.find_clusters(items_encoded)
         
-        return cluster_ids
\ No newline at end of file
+        return cluster_ids
+
+    def _centroid_key(self, retrospective_id: int, category: str):
+        return (self.transformer_name, retrospective_id, category)
+
+    def labelled_fingerprint(self, retrospective_id: int, category: str) -> Fingerprint:
+        """Number and latest revision of the category's labelled items.
+
+        Every write to an item moves its revision past all others and deletes
+        lower the count, so this changes whenever a label is written anywhere.
+        """
+        aggregate = RetrospectiveItem.objects.filter(
+            retrospective_id=retrospective_id, category=category, cluster_id__isnull=False
+        ).aggregate(count=Count('id'), revision=Max('revision'))
+        return aggregate['count'], aggregate['revision']
+
+    @staticmethod
+    def saved_fingerprint(items: List[RetrospectiveItem]) -> Fingerprint:
+        """Fingerprint of a column right after bulk_update labelled all of ``items``."""
+        return len(items), max((item.revision for item in items), default=None)
+
+    def refit_category(self, retrospective_id: int, category: str) -> Dict[int, int]:
+        """Fully re-cluster one category, save the labels and cache the new centroids.
+
+        Returns a mapping of item id to cluster id.
+        """
+        items = list(self.get_item_queryset(retrospective_id, category))
+        if not items:
+            centroid_cache.set(self._centroid_key(retrospective_id, category), CategoryCentroids(), (0, None))
+            return {}
+
+        vectors = self.embedding_store.get_embeddings([item.content for item in items])
+        labels = self.find_clusters(vectors)
+        for item, label in zip(items, labels):
+            item.cluster_id = int(label)
+        RetrospectiveItem.objects.bulk_update(items, ['cluster_id'])
+        broadcast_clusters(retrospective_id, {item.id: item.cluster_id for item in items})
+
+        centroid_cache.set(
+            self._centroid_key(retrospective_id, category),
+            CategoryCentroids.from_labels(vectors, labels),
+            self.saved_fingerprint(items),
+        )
+        return {item.id: item.cluster_id for item in items}
+
+    def cluster_retrospective(self, retrospective_id: int) -> Dict[str, Dict[int, int]]:
+        """Cluster every category of a retrospective and save all labels in one bulk update.
+
+        Returns the number of items per cluster id, grouped by category.
+        """
+        if not Retrospective.objects.filter(id=retrospective_id).exists():
+            raise ValueError(f"Retrospective with id {retrospective_id} not found")
+
+        return self.cluster_retrospectives([retrospective_id]).get(retrospective_id, {})
+
+    def cluster_retrospectives(self, retrospective_ids: Iterable[int]) -> Dict[int, Dict[str, Dict[int, int]]]:
+        """Cluster many retrospectives at once.
+
+        Items of all retrospectives are loaded in one query and encoded in one
+        transformer call (in batches of batch_size), then clustered per
+        (retrospective, category) group. Labels are saved with one bulk update
+        per retrospective.
+
+        Returns the per-category cluster counts of each retrospective.
+        """
+        items = list(
+            RetrospectiveItem.objects.filter(retrospective_id__in=list(retrospective_ids))
+            .order_by('retrospective_id', 'category', 'id')
+        )
+        if not items:
+            return {}
+        vectors = self.embedding_store.get_embeddings([item.content for item in items])
+
+        indices_by_group: Dict[Tuple[int, str], list] = {}
+        for index, item in enumerate(items):
+            indices_by_group.setdefault((item.retrospective_id, item.category), []).append(index)
+
+        cluster_counts: Dict[int, Dict[str, Dict[int, int]]] = {}
+        fitted_centroids = {}
+        for (retrospective_id, category), indices in indices_by_group.items():
+            labels = self.find_clusters(vectors[indices])
+            for index, label in zip(indices, labels):
+                items[index].cluster_id = int(label)
+            cluster_counts.setdefault(retrospective_id, {})[category] = dict(
+                sorted(Counter(int(label) for label in labels).items())
+            )
+            fitted_centroids[(retrospective_id, category)] = CategoryCentroids.from_labels(vectors[indices], labels)
+
+        items_by_retrospective: Dict[int, list] = {}
+        for item in items:
+            items_by_retrospective.setdefault(item.retrospective_id, []).append(item)
+        for retrospective_id, retrospective_items in items_by_retrospective.items():
+            with transaction.atomic():
+                RetrospectiveItem.objects.bulk_update(
+                    retrospective_items, ['cluster_id'], batch_size=len(retrospective_items)
+                )
+                broadcast_clusters(retrospective_id, {item.id: item.cluster_id for item in retrospective_items})
+            centroid_cache.forget(retrospective_id)
+
+        for (retrospective_id, category), centroids in fitted_centroids.items():
+            group_items = [items[index] for index in indices_by_group[(retrospective_id, category)]]
+            centroid_cache.set(
+                self._centroid_key(retrospective_id, category), centroids, self.saved_fingerprint(group_items)
+            )
+
+        logger.info(f"Clustered {len(items)} items of {len(items_by_retrospective)} retrospectives")
+        return cluster_counts
+
+    def cluster_representatives(
+        self, retrospective_id: int, items: Optional[QuerySet] = None
+    ) -> List[Tuple[RetrospectiveItem, int]]:
+        """Return the medoid item and the size of every cluster of a retrospective.
+
+        ``items`` narrows the retrospective's items to represent. The saved
+        cluster_id labels are reused, and cards added since the last clustering
+        (without a label) represent themselves. A category whose cards all
+        share one label or have none (e.g. the board was never clustered) is
+        clustered in memory, without saving. Clusters are returned in order of
+        their first item.
+        """
+        if items is None:
+            items = RetrospectiveItem.objects.filter(retrospective_id=retrospective_id)
+        items = list(
+            items.only('id', 'category', 'content', 'cluster_id')
+            .order_by('id')
+        )
+        if not items:
+            return []
+
+        vectors = self.embedding_store.get_embeddings([item.content for item in items])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        unit_vectors = vectors / np.where(norms == 0, 1, norms)
+
+        indices_by_category: Dict[str, list] = {}
+        for index, item in enumerate(items):
+            indices_by_category.setdefault(item.category, []).append(index)
+
+        members: Dict[tuple, list] = {}
+        for category, indices in indices_by_category.items():
+            labels = [items[index].cluster_id for index in indices]
+            if len(indices) > 1 and len(set(labels)) == 1:
+                labels = self.find_clusters(vectors[indices])
+            for index, label in zip(indices, labels):
+                key = (category, 'item', index) if label is None else (category, 'cluster', int(label))
+                members.setdefault(key, []).append(index)
+
+        representatives = []
+        for indices in sorted(members.values(), key=lambda cluster: cluster[0]):
+            # For unit vectors, the item with the largest summed cosine similarity
+            # to its cluster is the dot product with the cluster's vector sum: O(n)
+            cluster_vectors = unit_vectors[indices]
+            medoid = indices[int(np.argmax(cluster_vectors @ cluster_vectors.sum(axis=0)))]
+            representatives.append((items[medoid], len(indices)))
+        return representatives
+
+    def find_similar_items(self, item: RetrospectiveItem, top_k: int) -> List[Tuple[RetrospectiveItem, float]]:
+        """Return the top_k existing items of the same retrospective most similar to ``item``."""
+        others = list(
+            RetrospectiveItem.objects.filter(retrospective_id=item.retrospective_id)
+            .exclude(pk=item.pk)
+            .only('id', 'category', 'content', 'cluster_id')
+            .order_by('id')
+        )
+        if not others or top_k <= 0:
+            return []
+
+        vectors = self.embedding_store.get_embeddings([item.content] + [other.content for other in others])
+        similarities = cosine_similarity_matrix(vectors[:1], vectors[1:])[0]
+
+        top_k = min(top_k, len(others))
+        nearest = np.argpartition(-similarities, top_k - 1)[:top_k]
+        nearest = nearest[np.argsort(-similarities[nearest], kind='stable')]
+        return [(others[index], float(similarities[index])) for index in nearest]
+
+    def assign_item_cluster(self, item: RetrospectiveItem) -> int:
+        """Incrementally assign a new item to the nearest existing cluster, or open a new one.
+
+        Falls back to a full refit of the item's category when nothing is cached,
+        when labels were written since the centroids were cached (e.g. by
+        another process) or when the assignment moves a centroid further than
+        drift_threshold.
+        """
+        key = self._centroid_key(item.retrospective_id, item.category)
+        vector = self.embedding_store.get_embeddings([item.content])[0]
+
+        with transaction.atomic():
+            # Holds off other writes to the board until the label is saved
+            Retrospective.objects.select_for_update().filter(pk=item.retrospective_id).exists()
+            centroids = centroid_cache.get(key, self.labelled_fingerprint(item.retrospective_id, item.category))
+            if centroids is not None:
+                centroids = centroids.copy()
+                cluster_id, distance = centroids.nearest(vector)
+                if cluster_id is None or distance > self.eps:
+                    cluster_id = centroids.next_cluster_id()
+                centroids.add(cluster_id, vector)
+
+                drift = centroids.drift(cluster_id)
+                if drift <= self.drift_threshold:
+                    RetrospectiveItem.objects.filter(pk=item.pk).update(cluster_id=cluster_id)
+                    centroid_cache.set(
+                        key, centroids, self.labelled_fingerprint(item.retrospective_id, item.category)
+                    )
+                    broadcast_clusters(item.retrospective_id, {item.id: cluster_id})
+                    item.cluster_id = cluster_id
+                    return cluster_id
+
+                logger.info(
+                    f"Cluster {cluster_id} of retrospective {item.retrospective_id}/{item.category} "
+                    f"drifted {drift:.3f}, refitting"
+                )
+
+        item.cluster_id = self.refit_category(item.retrospective_id, item.category)[item.id]
+        return item.cluster_id
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Pluggable clustering engines for ClusteringService.
+
+Every engine turns an (n_items, dimensions) embedding matrix into one integer
+label per item, numbered 0, 1, 2, ... in order of first appearance. The
+``threshold`` of each engine is a euclidean distance in embedding space.
+"""
+
+import numpy as np
+import numpy.typing as npt
+from sklearn.cluster import DBSCAN, AgglomerativeClustering
+
+from api.schemas import DEFAULT_CLUSTER_EPS, DEFAULT_CLUSTERING_ENGINE
+
+
+def relabel_in_order(labels: npt.NDArray) -> npt.NDArray[np.int64]:
+    """Renumber labels 0, 1, 2, ... in order of first appearance."""
+    _, first_index, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first_index))
+    return order[inverse.ravel()].astype(np.int64)
+
+
+class ClusteringEngine:
+    """Base class for clustering engines."""
+    name = ''
+
+    def __init__(self, threshold: float = DEFAULT_CLUSTER_EPS):
+        self.threshold = threshold
+
+    def fit_predict(self, vectors: npt.NDArray) -> npt.NDArray[np.int64]:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) < 2:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return relabel_in_order(self._fit_predict(vectors))
+
+    def _fit_predict(self, vectors: npt.NDArray) -> npt.NDArray:
+        raise NotImplementedError
+
+
+class DBSCANEngine(ClusteringEngine):
+    """Density based clustering; items within ``threshold`` of any cluster member join it.
+
+    Worst case O(n²) distance computations.
+    """
+    name = 'dbscan'
+
+    def _fit_predict(self, vectors):
+        return DBSCAN(eps=self.threshold, min_samples=1).fit(vectors).labels_
+
+
+class AgglomerativeEngine(ClusteringEngine):
+    """Average-linkage agglomerative clustering cut at ``threshold``.
+
+    Merges sparse boards less eagerly than DBSCAN's single-link chaining, but
+    needs O(n²) memory.
+    """
+    name = 'agglomerative'
+
+    def __init__(self, threshold: float = DEFAULT_CLUSTER_EPS, linkage: str = 'average'):
+        super().__init__(threshold)
+        self.linkage = linkage
+
+    def _fit_predict(self, vectors):
+        return AgglomerativeClustering(
+            n_clusters=None, distance_threshold=self.threshold, linkage=self.linkage
+        ).fit(vectors).labels_
+
+
+class LeaderEngine(ClusteringEngine):
+    """Single pass leader clustering.
+
+    Each item joins the nearest existing leader within ``threshold`` or becomes
+    a new leader. O(n * clusters), so it stays fast on very large boards at the
+    cost of depending on item order.
+    """
+    name = 'leader'
+
+    def _fit_predict(self, vectors):
+        leaders = np.empty_like(vectors)
+        leader_count = 0
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for index, vector in enumerate(vectors):
+            if leader_count:
+                distances = np.linalg.norm(leaders[:leader_count] - vector, axis=1)
+                nearest = int(np.argmin(distances))
+                if distances[nearest] <= self.threshold:
+                    labels[index] = nearest
+                    continue
+            leaders[leader_count] = vector
+            labels[index] = leader_count
+            leader_count += 1
+        return labels
+
+
+CLUSTERING_ENGINES = {
+    engine.name: engine
+    for engine in (DBSCANEngine, AgglomerativeEngine, LeaderEngine)
+}
+
+
+def get_clustering_engine(name: str = DEFAULT_CLUSTERING_ENGINE, threshold: float = DEFAULT_CLUSTER_EPS) -> ClusteringEngine:
+    """Instantiate the clustering engine registered under ``name``."""
+    try:
+        engine_class = CLUSTERING_ENGINES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown clustering engine '{name}'. Choose one of: {', '.join(sorted(CLUSTERING_ENGINES))}"
+        )
+    return engine_class(threshold=threshold)
@@ -0,0 +1,89 @@
+"""
+Persistent embedding cache for retrospective item content.
+
+Embeddings are keyed on (transformer name, SHA-256 of the content), so an item
+is only encoded when its content is new or has been edited. Vectors are stored
+as packed float32 bytes in the ItemEmbedding table.
+"""
+
+import hashlib
+import logging
+from typing import Callable, Iterable, List
+
+import numpy as np
+import numpy.typing as npt
+
+from api.models import ItemEmbedding
+
+logger = logging.getLogger(__name__)
+
+# Keep IN (...) lookups below SQLite's bound-parameter limit
+FETCH_CHUNK_SIZE = 500
+
+
+def content_hash(content: str) -> str:
+    """Return the cache key for a piece of item content."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def pack_vector(vector: npt.NDArray) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def unpack_vector(data: bytes) -> npt.NDArray[np.float32]:
+    return np.frombuffer(bytes(data), dtype=np.float32)
+
+
+class EmbeddingStore:
+    """Looks up cached embeddings and encodes only the missing contents."""
+
+    def __init__(self, transformer_name: str, encoder: Callable[[List[str]], npt.NDArray]):
+        self.transformer_name = transformer_name
+        self.encoder = encoder
+
+    def get_embeddings(self, contents: List[str]) -> npt.NDArray[np.float32]:
+        """Return one embedding row per content, encoding cache misses in one batch."""
+        if not contents:
+            return np.empty((0, 0), dtype=np.float32)
+
+        hashes = [content_hash(content) for content in contents]
+        vectors = self._fetch(set(hashes))
+
+        missing = {}
+        for digest, content in zip(hashes, contents):
+            if digest not in vectors:
+                missing.setdefault(digest, content)
+
+        if missing:
+            encoded = np.asarray(self.encoder(list(missing.values())), dtype=np.float32)
+            new_rows = []
+            for digest, vector in zip(missing.keys(), encoded):
+                vectors[digest] = vector
+                new_rows.append(ItemEmbedding(
+                    transformer=self.transformer_name,
+                    content_hash=digest,
+                    dimensions=vector.shape[0],
+                    vector=pack_vector(vector),
+                ))
+            # Another worker may have stored the same content concurrently
+            ItemEmbedding.objects.bulk_create(new_rows, batch_size=FETCH_CHUNK_SIZE, ignore_conflicts=True)
+            logger.debug(f"Encoded {len(new_rows)} of {len(contents)} items with '{self.transformer_name}'")
+
+        return np.vstack([vectors[digest] for digest in hashes])
+
+    def _fetch(self, hashes: Iterable[str]) -> dict:
+        hashes = list(hashes)
+        vectors = {}
+        for start in range(0, len(hashes), FETCH_CHUNK_SIZE):
+            rows = ItemEmbedding.objects.filter(
+                transformer=self.transformer_name,
+                content_hash__in=hashes[start:start + FETCH_CHUNK_SIZE],
+            ).values_list('content_hash', 'vector')
+            vectors.update((digest, unpack_vector(vector)) for digest, vector in rows)
+        return vectors
+
+
+def invalidate_content(content: str) -> int:
+    """Drop cached embeddings of ``content`` for every transformer."""
+    deleted, _ = ItemEmbedding.objects.filter(content_hash=content_hash(content)).delete()
+    return deleted
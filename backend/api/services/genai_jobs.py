@@ -0,0 +1,211 @@
+"""
+Background execution of action item generation.
+
+The Ollama round trip can take tens of seconds, so requests only create a
+GenAIJob and hand it to a small, bounded thread pool. Clients poll the job for
+its status and result. No external broker is needed.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import GenAIJob
+from api.services.generate_actionitems import GenAIService
+
+logger = logging.getLogger(__name__)
+
+
+QUEUE_FULL_MESSAGE = 'Too many action item generations in progress, please try again later'
+
+
+class GenAIQueueFull(Exception):
+    """Raised when too many generation jobs are already waiting."""
+
+
+class GenAIJobAbandoned(Exception):
+    """Raised to discard the output of a job that was superseded or timed out while it ran."""
+
+
+def run_genai_job(job_id: int, force: bool = False, stream: bool = False) -> None:
+    """Generate the action items of one job and store the outcome on the job.
+
+    ``force`` bypasses the prompt result cache. With ``stream`` the items are
+    generated with a streaming completion, and each one is saved and added to
+    the job's result as soon as it is complete, for clients following the job
+    over Server-Sent Events. Jobs that are no longer pending, e.g. because a
+    forced regeneration superseded them, are skipped. A job superseded or
+    timed out while it runs saves nothing more: every save first locks the
+    job row and checks that it still holds this run's claim.
+    """
+    # Imported here to avoid a circular import with api.serializers
+    from api.serializers import RetrospectiveItemSerializer
+
+    claimed_at = timezone.now()
+    claimed = GenAIJob.objects.filter(id=job_id, status='pending').update(
+        status='running', started_at=claimed_at
+    )
+    if not claimed:
+        logger.info(f"GenAI job {job_id} is no longer pending, skipping it")
+        return
+    job = GenAIJob.objects.get(id=job_id)
+    # Only the run that claimed the job may finish it, unless it was given up on meanwhile
+    running = GenAIJob.objects.filter(id=job_id, status='running', started_at=claimed_at)
+
+    def check_claim() -> None:
+        # Called in the transaction saving items; the lock holds off superseding until it commits
+        if not running.select_for_update().exists():
+            raise GenAIJobAbandoned(f"GenAI job {job_id} was given up on, discarding its items")
+
+    try:
+        if stream:
+            action_items = []
+            for item in GenAIService().stream_retrospective_items_from_ai(
+                job.retrospective_id, force=force, before_save=check_claim
+            ):
+                if item.category == 'actions':
+                    action_items.append(RetrospectiveItemSerializer(item).data)
+                    running.update(result={'message': 'Generating action items', 'action_items': action_items})
+        else:
+            created_items = GenAIService().create_retrospective_items_from_ai(
+                retrospective_id=job.retrospective_id,
+                force=force,
+                before_save=check_claim,
+            )
+            action_items = RetrospectiveItemSerializer(
+                [item for item in created_items if item.category == 'actions'], many=True
+            ).data
+        running.update(
+            status='succeeded',
+            result={
+                'message': f'Successfully generated {len(action_items)} action items',
+                'action_items': action_items,
+            },
+            finished_at=timezone.now(),
+        )
+    except GenAIJobAbandoned as e:
+        logger.info(str(e))
+    except Exception as e:
+        logger.error(f"GenAI job {job_id} failed: {e}")
+        running.update(
+            status='failed',
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+
+
+class GenAIJobQueue:
+    """Bounded thread pool running GenAI jobs outside the request/response cycle.
+
+    At most ``max_workers`` generations run at once and at most ``max_pending``
+    jobs may wait, so a slow model can't tie up the web server's workers.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, run_inline: Optional[bool] = None):
+        self.max_workers = max_workers
+        self._run_inline = run_inline
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def run_inline(self) -> bool:
+        """Run jobs synchronously in the calling thread (GENAI_JOBS_RUN_INLINE, e.g. for tests)."""
+        if self._run_inline is not None:
+            return self._run_inline
+        return settings.GENAI_JOBS_RUN_INLINE
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='genai-job')
+            return self._executor
+
+    def submit(self, job: GenAIJob, force: bool = False, stream: bool = False) -> None:
+        """Queue a job, raising GenAIQueueFull when the queue is at capacity.
+
+        Inside a transaction the job is only queued once the transaction
+        commits, so the worker can see it and a rolled back job takes no slot.
+        A job that finds the queue full then is marked failed instead.
+        """
+        if self.run_inline:
+            run_genai_job(job.id, force=force, stream=stream)
+            return
+
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self._start(job.id, force, stream))
+        elif not self._start(job.id, force, stream):
+            raise GenAIQueueFull(QUEUE_FULL_MESSAGE)
+
+    def _start(self, job_id: int, force: bool, stream: bool) -> bool:
+        if not self._slots.acquire(blocking=False):
+            GenAIJob.objects.filter(id=job_id).update(
+                status='failed', error=QUEUE_FULL_MESSAGE, finished_at=timezone.now()
+            )
+            return False
+        try:
+            self.executor.submit(self._run, job_id, force, stream)
+        except Exception:
+            self._slots.release()
+            raise
+        return True
+
+    def _run(self, job_id: int, force: bool, stream: bool) -> None:
+        try:
+            run_genai_job(job_id, force=force, stream=stream)
+        finally:
+            self._slots.release()
+            close_old_connections()
+
+
+genai_job_queue = GenAIJobQueue(
+    max_workers=settings.GENAI_MAX_WORKERS,
+    max_pending=settings.GENAI_MAX_PENDING_JOBS,
+)
+
+
+def fail_stale_genai_jobs(retrospective_id: int) -> int:
+    """Mark the retrospective's jobs unfinished after GENAI_JOB_TIMEOUT as failed.
+
+    A job whose worker process was restarted or killed would otherwise stay
+    pending or running forever and block every later generation.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.GENAI_JOB_TIMEOUT)
+    return GenAIJob.objects.filter(
+        Q(started_at__lt=cutoff) | Q(started_at__isnull=True, created_at__lt=cutoff),
+        retrospective_id=retrospective_id,
+        status__in=['pending', 'running'],
+    ).update(status='failed', error='Timed out before finishing', finished_at=now)
+
+
+def enqueue_genai_job(
+    retrospective_id: int, requested_by=None, force: bool = False, stream: bool = False
+) -> GenAIJob:
+    """Return the retrospective's unfinished job, or create and queue a new one.
+
+    ``force`` supersedes an unfinished job instead of returning it; ``stream``
+    publishes a new job's items one by one (see run_genai_job).
+    """
+    fail_stale_genai_jobs(retrospective_id)
+    unfinished = GenAIJob.objects.filter(retrospective_id=retrospective_id, status__in=['pending', 'running'])
+    if force:
+        unfinished.update(status='failed', error='Superseded by a forced regeneration', finished_at=timezone.now())
+    else:
+        job = unfinished.order_by('-created_at').first()
+        if job is not None:
+            return job
+
+    job = GenAIJob.objects.create(retrospective_id=retrospective_id, requested_by=requested_by)
+    genai_job_queue.submit(job, force=force, stream=stream)
+    if genai_job_queue.run_inline:
+        job.refresh_from_db()
+    return job
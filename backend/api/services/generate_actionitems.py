@@ -1,89 +1,302 @@
 import json
 import logging
 import os
-from typing import List
-from ollama import Client
+from typing import Callable, Iterator, List, Optional, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
 from api.models import Retrospective, RetrospectiveItem, User
-from api.schemas import RetroItem, RetroItemList, SYSTEM_PROMPT_GENERATE_ACTIONS, DEFAULT_OLLAMA_HOST, DEFAULT_AI_MODEL
+from api.schemas import (
+    RetroItem, RetroItemList, SYSTEM_PROMPT_GENERATE_ACTIONS, SYSTEM_PROMPT_SUMMARIZE_ITEMS,
+    DEFAULT_OLLAMA_HOST, DEFAULT_AI_MODEL,
+)
+from api.services.board_events import broadcast_items_bulk
+from api.services.cluster_retroitems import ClusteringService
+from api.services.ollama_clients import get_ollama_client
+from api.services.prompt_builder import (
+    PromptCard, chunk_cards, collapse_clusters, estimate_tokens, format_cards, to_cards, truncate_cards,
+)
+from api.services.prompt_cache import prompt_digest, prompt_result_cache
 
 logger = logging.getLogger(__name__)
 
+# Grid spacing of generated cards - different for minimized vs maximized
+MIN_X_SPACING = 100
+MAX_X_SPACING = 50
+
+# Summarization passes before an oversized prompt is truncated instead
+MAX_SUMMARY_ROUNDS = 3
+
+GENAI_SERVICE_USERNAME = 'gen_ai_serviceuser'
+
+T = TypeVar('T')
+
+
+def get_service_user_id() -> Optional[int]:
+    """Id of the GenAI service user.
+
+    Looked up for every save rather than remembered: create_genai_user --force
+    recreates the user from another process, which running servers can't notice.
+    """
+    return User.objects.filter(username=GENAI_SERVICE_USERNAME).values_list('id', flat=True).first()
+
+
+def save_as_service_user(save: Callable[[Optional[int]], T]) -> T:
+    """Call ``save`` with the service user's id in a transaction of its own.
+
+    If the user was recreated between the lookup and the insert, the insert
+    fails on the foreign key; it is then retried once with the new id.
+    """
+    try:
+        with transaction.atomic():
+            return save(get_service_user_id())
+    except IntegrityError as e:
+        logger.warning(f"Saving generated items failed ({e}), retrying with a fresh service user")
+        with transaction.atomic():
+            return save(get_service_user_id())
+
+
+class RetroItemStreamParser:
+    """Incrementally extracts complete RetroItems from a streamed JSON completion.
+
+    Accepts either ``{"retro_items": [{...}, ...]}`` or a bare ``[{...}, ...]``
+    and yields each item object as soon as its closing brace has arrived.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.position = 0
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.item_start = None
+        self.item_depth = None
+
+    def feed(self, chunk: str) -> List[RetroItem]:
+        """Add a chunk of the completion and return the items it completed."""
+        self.buffer += chunk
+        items = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                # An object directly inside the top-level (or retro_items) array is an item
+                if char == '{' and self.stack and self.stack[-1] == '[' and len(self.stack) <= 2:
+                    self.item_start = self.position
+                    self.item_depth = len(self.stack)
+                self.stack.append(char)
+            elif char in '}]':
+                if self.stack:
+                    self.stack.pop()
+                if char == '}' and self.item_start is not None and len(self.stack) == self.item_depth:
+                    items.append(self._parse_item(self.buffer[self.item_start:self.position + 1]))
+                    self.item_start = None
+            self.position += 1
+        return [item for item in items if item is not None]
+
+    def _parse_item(self, text: str):
+        try:
+            return RetroItem.model_validate_json(text)
+        except ValueError as e:
+            logger.warning(f"Skipping malformed streamed RetroItem {text!r}: {e}")
+            return None
+
+
+def response_content(response) -> str:
+    """Message content of a chat response, which may be a dict or an object."""
+    if isinstance(response, dict):
+        return response['message']['content']
+    return response.message.content
+
 
 class GenAIService:
     """Service for generating action items using AI."""
     
-    def __init__(self, model: str = DEFAULT_AI_MODEL, ollama_host: str = None):
+    def __init__(
+        self,
+        model: str = DEFAULT_AI_MODEL,
+        ollama_host: str = None,
+        timeout: Optional[float] = None,
+        max_prompt_tokens: Optional[int] = None,
+        summary_workers: Optional[int] = None,
+        cluster_prompts: Optional[bool] = None,
+    ):
         self.model = model
         self.ollama_host = ollama_host or os.environ.get('OLLAMA_HOST', DEFAULT_OLLAMA_HOST)
+        self.timeout = timeout if timeout is not None else settings.OLLAMA_TIMEOUT
+        self.max_prompt_tokens = max_prompt_tokens or settings.GENAI_MAX_PROMPT_TOKENS
+        self.summary_workers = summary_workers or settings.GENAI_SUMMARY_WORKERS
+        self.cluster_prompts = cluster_prompts if cluster_prompts is not None else settings.GENAI_CLUSTER_PROMPTS
+
+    @property
+    def client(self):
+        """Pooled Ollama client for this service's host and timeout."""
+        return get_ollama_client(self.ollama_host, self.timeout)
     
+    def get_prompt_items(self, retrospective_id: int) -> QuerySet:
+        """Items of a retrospective to generate from, in a stable order.
+
+        Generated cards are left out: both the service user's and everything in
+        the 'actions' square. Otherwise saving one generation's result would
+        change the prompt, and so the cache key, of the next one.
+        """
+        return (
+            RetrospectiveItem.objects.filter(retrospective_id=retrospective_id)
+            .exclude(category='actions')
+            .exclude(author__username=GENAI_SERVICE_USERNAME)
+            .order_by('id')
+        )
+
     def get_retrospective_items(self, retrospective_id: int) -> List[RetroItem]:
-        """Get all items from a retrospective."""
+        """Get the items of a retrospective that action items are generated from."""
         try:
-            retrospective = Retrospective.objects.get(id=retrospective_id)
-            items = retrospective.items.all()
+            Retrospective.objects.only('id').get(id=retrospective_id)
+            # Stable order, so an unchanged board always gives the same prompt
+            items = self.get_prompt_items(retrospective_id)
 
             return [
                 RetroItem(
                     category=item.category,
                     content=item.content,
+                    cluster_id=item.cluster_id,
                 )
                 for item in items
             ]
         except Retrospective.DoesNotExist:
             raise ValueError(f"Retrospective with id {retrospective_id} not found")
     
-    def generate_retrospective_items(self, retrospective_id: int) -> List[RetroItem]:
-        """Generate action items for a retrospective using AI."""
+    def get_prompt_cards(self, retrospective_id: int) -> List[PromptCard]:
+        """Cards to list in the prompt.
+
+        With ``cluster_prompts`` every cluster is represented by its medoid card
+        and its size, otherwise every item is listed.
+        """
+        if not self.cluster_prompts:
+            return to_cards(self.get_retrospective_items(retrospective_id))
+
+        representatives = ClusteringService().cluster_representatives(
+            retrospective_id, items=self.get_prompt_items(retrospective_id)
+        )
+        if not representatives and not Retrospective.objects.filter(id=retrospective_id).exists():
+            raise ValueError(f"Retrospective with id {retrospective_id} not found")
+        return [
+            PromptCard(category=item.category, content=item.content, count=count, cluster_id=item.cluster_id)
+            for item, count in representatives
+        ]
+
+    def build_user_prompt(self, cards: List[PromptCard]) -> str:
+        """Build the user prompt listing the (collapsed) retrospective items."""
+        items_text = format_cards(cards)
+
+        return f"Here are the retrospective items:\n\n{items_text}\n\nPlease generate actionable items to improve team performance."
+
+    def build_summary_prompt(self, cards: List[PromptCard]) -> str:
+        """Build the user prompt asking for the themes of one chunk of cards."""
+        return f"Here are the retrospective items to summarize:\n\n{format_cards(cards)}"
+
+    def fit_user_prompt(self, cards: List[PromptCard], user_prompt: str) -> str:
+        """Return ``user_prompt``, or a smaller one when it exceeds the token budget.
+
+        Clustered cards are collapsed first. If that is not enough, every
+        category chunk is summarized by the model in parallel (map) and the
+        summaries are listed in a new prompt (reduce), repeated up to
+        MAX_SUMMARY_ROUNDS times before the listing is truncated.
+        """
+        if estimate_tokens(user_prompt) <= self.max_prompt_tokens:
+            return user_prompt
+
+        cards = collapse_clusters(cards)
+        user_prompt = self.build_user_prompt(cards)
+        rounds = 0
+        while estimate_tokens(user_prompt) > self.max_prompt_tokens:
+            if rounds == MAX_SUMMARY_ROUNDS:
+                logger.warning(f"Prompt still exceeds {self.max_prompt_tokens} tokens after summarizing, truncating")
+                budget = self.max_prompt_tokens - estimate_tokens(self.build_user_prompt([]))
+                return self.build_user_prompt(truncate_cards(cards, budget))
+            cards = self.summarize_cards(cards)
+            user_prompt = self.build_user_prompt(cards)
+            rounds += 1
+        return user_prompt
+
+    def summarize_cards(self, cards: List[PromptCard]) -> List[PromptCard]:
+        """Summarize cards per category chunk, running the chunks concurrently."""
+        budget = self.max_prompt_tokens - estimate_tokens(self.build_summary_prompt([]))
+        chunks = chunk_cards(cards, budget)
+        logger.info(f"Summarizing {len(cards)} cards in {len(chunks)} chunks")
+        with ThreadPoolExecutor(max_workers=min(self.summary_workers, len(chunks))) as executor:
+            summaries = list(executor.map(self.summarize_chunk, chunks))
+        return [card for summary in summaries for card in summary]
+
+    def summarize_chunk(self, cards: List[PromptCard]) -> List[PromptCard]:
+        """Ask the model for the themes of a single-category chunk of cards."""
+        category = cards[0].category
+        response = self.client.chat(
+            model=self.model,
+            messages=[
+                {'role': 'system', 'content': SYSTEM_PROMPT_SUMMARIZE_ITEMS},
+                {'role': 'user', 'content': self.build_summary_prompt(cards)}
+            ],
+            format=RetroItemList.model_json_schema(),
+        )
+        summary = RetroItemList.model_validate_json(response_content(response))
+        # The model decides the wording, the chunk decides the category
+        return [PromptCard(category=category, content=item.content) for item in summary.retro_items]
+
+    def prompt_digest(self, user_prompt: str) -> str:
+        """Cache key of a generation with this service's model and system prompt."""
+        return prompt_digest(self.model, SYSTEM_PROMPT_GENERATE_ACTIONS, user_prompt)
+
+    def generate_retrospective_items(self, retrospective_id: int, force: bool = False) -> List[RetroItem]:
+        """Generate action items for a retrospective using AI.
+
+        Results for an unchanged board are served from the prompt result cache
+        unless ``force`` is set.
+        """
         try:
             # Get retrospective items
-            retro_items = self.get_retrospective_items(retrospective_id)
+            cards = self.get_prompt_cards(retrospective_id)
 
-            if not retro_items:
+            if not cards:
                 logger.warning(f"No items found for retrospective {retrospective_id}")
                 return []
 
-            # Prepare the prompt
-            items_text = "\n".join([
-                f"- {item.category.upper()}: {item.content}"
-                for item in retro_items
-            ])
+            # Prepare the prompt; the cache is keyed on the full board, before any summarizing
+            user_prompt = self.build_user_prompt(cards)
+            digest = self.prompt_digest(user_prompt)
 
-            user_prompt = f"Here are the retrospective items:\n\n{items_text}\n\nPlease generate actionable items to improve team performance."
+            cached = None if force else prompt_result_cache.get(digest)
+            if cached is not None:
+                logger.info(f"Using cached action items for retrospective {retrospective_id}")
+                return cached.retro_items
+
+            user_prompt = self.fit_user_prompt(cards, user_prompt)
 
             # Call Ollama
-            # Set the Ollama host for this request
-            original_host = os.environ.get('OLLAMA_HOST')
-            os.environ['OLLAMA_HOST'] = self.ollama_host
-            
-            try:
-                # Import ollama client here to ensure it picks up the environment variable
-                from ollama import Client
-                client = Client(host=self.ollama_host)
-
-                response = client.chat(
-                    model=self.model,
-                    messages=[
-                        {'role': 'system', 'content': SYSTEM_PROMPT_GENERATE_ACTIONS},
-                        {'role': 'user', 'content': user_prompt}
-                    ],
-                    format=RetroItemList.model_json_schema(),
-                )
-            finally:
-                # Restore original host setting
-                if original_host is not None:
-                    os.environ['OLLAMA_HOST'] = original_host
-                elif 'OLLAMA_HOST' in os.environ:
-                    del os.environ['OLLAMA_HOST']
+            response = self.client.chat(
+                model=self.model,
+                messages=[
+                    {'role': 'system', 'content': SYSTEM_PROMPT_GENERATE_ACTIONS},
+                    {'role': 'user', 'content': user_prompt}
+                ],
+                format=RetroItemList.model_json_schema(),
+            )
 
             # Parse the response
             try:
                 # Handle both dict and object response formats
-                if isinstance(response, dict):
-                    content = response['message']['content']
-                else:
-                    content = response.message.content
-                
+                content = response_content(response)
+
                 retro_item_dict = RetroItemList.model_validate_json(content)
+                prompt_result_cache.set(digest, retro_item_dict)
                 return retro_item_dict.retro_items
             except (json.JSONDecodeError, KeyError, AttributeError) as e:
                 logger.error(f"Failed to parse AI response as RetroItems: {e}")
@@ -100,39 +313,34 @@ class GenAIService:
             raise
     
 
-    def create_retrospective_items_from_ai(self, retrospective_id: int) -> List[RetrospectiveItem]:
-        """Generate and create retrospective items in the database."""
+    def create_retrospective_items_from_ai(
+        self, retrospective_id: int, force: bool = False, before_save: Optional[Callable[[], None]] = None
+    ) -> List[RetrospectiveItem]:
+        """Generate and create retrospective items in the database.
+
+        ``before_save`` is called in the saving transaction before anything is
+        written; raising from it discards the generated items.
+        """
         try:
             # Generate retrospective items using AI
-            ai_retrospective_items = self.generate_retrospective_items(retrospective_id)
+            ai_retrospective_items = self.generate_retrospective_items(retrospective_id, force=force)
             
             if not ai_retrospective_items:
                 return []
             
-            author = User.objects.filter(username="gen_ai_serviceuser").first()
+            def save(author_id: Optional[int]) -> List[RetrospectiveItem]:
+                if before_save is not None:
+                    before_save()
+                # Create all RetrospectiveItem objects in one round trip; all or nothing
+                created = RetrospectiveItem.objects.bulk_create([
+                    self.build_retrospective_item(retrospective_id, author_id, item_data, index)
+                    for index, item_data in enumerate(ai_retrospective_items)
+                ])
+                # bulk_create sends no post_save signals
+                broadcast_items_bulk(created=created)
+                return created
 
-            # Create RetrospectiveItem objects
-            created_items = []
-            retrospective = Retrospective.objects.get(id=retrospective_id)
-            
-            for index, item_data in enumerate(ai_retrospective_items):
-                # Create organized grid layout for action items
-                
-                # Spacing for organized layout - different for minimized vs maximized
-                min_x_spacing = 100  # Horizontal spacing
-                max_x_spacing = 50  # Horizontal spacing
-                
-                retrospective_item = RetrospectiveItem.objects.create(
-                    retrospective=retrospective,
-                    content=item_data.content,
-                    category=item_data.category,
-                    x_minimized=index * min_x_spacing,
-                    y_minimized=0,
-                    x_maximized=index * max_x_spacing,
-                    y_maximized=0,
-                    author=author,
-                )
-                created_items.append(retrospective_item)
+            created_items = save_as_service_user(save)
             
             logger.info(f"Created {len(created_items)} retrospective items for retrospective {retrospective_id}")
             return created_items
@@ -140,3 +348,73 @@ class GenAIService:
         except Exception as e:
             logger.error(f"Error creating retrospective items: {e}")
             raise
+
+    def build_retrospective_item(self, retrospective_id: int, author_id: Optional[int], item_data: RetroItem, index: int) -> RetrospectiveItem:
+        """Build an unsaved RetrospectiveItem for a generated item, laid out in a row."""
+        return RetrospectiveItem(
+            retrospective_id=retrospective_id,
+            content=item_data.content,
+            category=item_data.category,
+            x_minimized=index * MIN_X_SPACING,
+            y_minimized=0,
+            x_maximized=index * MAX_X_SPACING,
+            y_maximized=0,
+            author_id=author_id,
+        )
+
+    def stream_retrospective_items(self, retrospective_id: int, force: bool = False) -> Iterator[RetroItem]:
+        """Generate action items with a streaming completion, yielding each item as soon as it is complete."""
+        cards = self.get_prompt_cards(retrospective_id)
+        if not cards:
+            logger.warning(f"No items found for retrospective {retrospective_id}")
+            return
+
+        user_prompt = self.build_user_prompt(cards)
+        digest = self.prompt_digest(user_prompt)
+        cached = None if force else prompt_result_cache.get(digest)
+        if cached is not None:
+            logger.info(f"Using cached action items for retrospective {retrospective_id}")
+            yield from cached.retro_items
+            return
+
+        user_prompt = self.fit_user_prompt(cards, user_prompt)
+
+        stream = self.client.chat(
+            model=self.model,
+            messages=[
+                {'role': 'system', 'content': SYSTEM_PROMPT_GENERATE_ACTIONS},
+                {'role': 'user', 'content': user_prompt}
+            ],
+            format=RetroItemList.model_json_schema(),
+            stream=True,
+        )
+
+        parser = RetroItemStreamParser()
+        generated = []
+        for chunk in stream:
+            content = response_content(chunk)
+            for item in parser.feed(content or ''):
+                generated.append(item)
+                yield item
+        prompt_result_cache.set(digest, RetroItemList(retro_items=generated))
+
+    def stream_retrospective_items_from_ai(
+        self, retrospective_id: int, force: bool = False, before_save: Optional[Callable[[], None]] = None
+    ) -> Iterator[RetrospectiveItem]:
+        """Generate retrospective items, saving and yielding each one as it arrives.
+
+        ``before_save`` is called in the transaction saving each item, as in
+        create_retrospective_items_from_ai.
+        """
+        if not Retrospective.objects.filter(id=retrospective_id).exists():
+            raise ValueError(f"Retrospective with id {retrospective_id} not found")
+
+        for index, item_data in enumerate(self.stream_retrospective_items(retrospective_id, force=force)):
+            def save(author_id: Optional[int]) -> RetrospectiveItem:
+                if before_save is not None:
+                    before_save()
+                retrospective_item = self.build_retrospective_item(retrospective_id, author_id, item_data, index)
+                retrospective_item.save()
+                return retrospective_item
+
+            yield save_as_service_user(save)
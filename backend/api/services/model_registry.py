@@ -0,0 +1,136 @@
+"""
+Process-wide registry of SentenceTransformer models.
+
+Loading a SentenceTransformer reads hundreds of MB from disk, so every
+ClusteringService borrows its model from this registry instead of loading
+its own. Each model name is loaded lazily, at most once per worker process.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelLoadMetrics:
+    """Metrics recorded when a model is loaded into the registry."""
+    model_name: str
+    load_seconds: float
+    rss_before_bytes: int
+    rss_after_bytes: int
+
+    @property
+    def rss_delta_bytes(self) -> int:
+        return self.rss_after_bytes - self.rss_before_bytes
+
+
+def current_rss_bytes() -> int:
+    """Return the resident set size of the current process in bytes, or 0 if it can't be read."""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        # POSIX only
+        import resource
+    except ImportError:
+        return 0
+    # Falls back to the peak RSS, which macOS reports in bytes and other systems in kilobytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def _load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+class SentenceTransformerRegistry:
+    """Thread-safe, lazily populated cache of SentenceTransformer models."""
+
+    def __init__(self, loader: Callable[[str], object] = _load_sentence_transformer):
+        self._loader = loader
+        self._models: Dict[str, object] = {}
+        self._metrics: Dict[str, ModelLoadMetrics] = {}
+        self._lock = threading.Lock()
+        self._model_locks: Dict[str, threading.Lock] = {}
+
+    def _lock_for(self, model_name: str) -> threading.Lock:
+        with self._lock:
+            return self._model_locks.setdefault(model_name, threading.Lock())
+
+    def get(self, model_name: str):
+        """Return the model, loading it on first use."""
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        # One lock per model so loading one model doesn't block readers of another
+        with self._lock_for(model_name):
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._load(model_name)
+        return model
+
+    def _load(self, model_name: str):
+        rss_before = current_rss_bytes()
+        started = time.perf_counter()
+        model = self._loader(model_name)
+        metrics = ModelLoadMetrics(
+            model_name=model_name,
+            load_seconds=time.perf_counter() - started,
+            rss_before_bytes=rss_before,
+            rss_after_bytes=current_rss_bytes(),
+        )
+        self._models[model_name] = model
+        self._metrics[model_name] = metrics
+        logger.info(
+            f"Loaded sentence transformer '{model_name}' in {metrics.load_seconds:.2f}s "
+            f"(+{metrics.rss_delta_bytes / 2**20:.1f} MiB RSS)"
+        )
+        return model
+
+    def warm_up(self, model_names: Iterable[str]) -> None:
+        """Eagerly load the given models, e.g. at application startup."""
+        for model_name in model_names:
+            self.get(model_name)
+
+    def is_loaded(self, model_name: str) -> bool:
+        return model_name in self._models
+
+    def metrics(self, model_name: Optional[str] = None):
+        """Return load metrics for one model, or a dict of all loaded models."""
+        if model_name is not None:
+            return self._metrics.get(model_name)
+        return dict(self._metrics)
+
+    def clear(self) -> None:
+        """Drop all loaded models (mainly for tests)."""
+        with self._lock:
+            self._models.clear()
+            self._metrics.clear()
+            self._model_locks.clear()
+
+
+sentence_transformer_registry = SentenceTransformerRegistry()
+
+
+def get_sentence_transformer(model_name: str):
+    """Return the shared SentenceTransformer for ``model_name``."""
+    return sentence_transformer_registry.get(model_name)
@@ -0,0 +1,38 @@
+"""
+Shared Ollama clients.
+
+An ``ollama.Client`` wraps an httpx client with its own connection pool, so one
+client per (host, timeout) is created per process and reused by every request.
+httpx clients are thread-safe, which lets concurrent generations share
+keep-alive connections without touching process-global state such as
+``os.environ['OLLAMA_HOST']``.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+from ollama import Client
+
+_clients: Dict[Tuple[str, Optional[float]], Client] = {}
+_lock = threading.Lock()
+
+
+def get_ollama_client(host: str, timeout: Optional[float] = None) -> Client:
+    """Return the pooled client for ``host`` whose requests time out after ``timeout`` seconds."""
+    key = (host, timeout)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = Client(host=host, timeout=timeout)
+                _clients[key] = client
+    return client
+
+
+def close_ollama_clients() -> None:
+    """Close all pooled clients and their connections."""
+    with _lock:
+        for client in _clients.values():
+            client._client.close()
+        _clients.clear()
@@ -0,0 +1,107 @@
+"""
+Token-budgeted prompt construction for action item generation.
+
+Tokens are estimated at about four characters each, which is close enough for
+the models we run and needs no tokenizer. Boards over budget first have the
+cards of each cluster collapsed into one representative line with a count;
+boards that still don't fit are split into per-category chunks that are
+summarized independently.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from api.schemas import RetroItem
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of ``text``."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+@dataclass
+class PromptCard:
+    """One line of the user prompt, standing in for ``count`` similar cards."""
+    category: str
+    content: str
+    count: int = 1
+    cluster_id: Optional[int] = None
+
+    def line(self) -> str:
+        suffix = f" (x{self.count})" if self.count > 1 else ''
+        return f"- {self.category.upper()}: {self.content}{suffix}"
+
+
+def format_cards(cards: List[PromptCard]) -> str:
+    return "\n".join(card.line() for card in cards)
+
+
+def to_cards(retro_items: List[RetroItem]) -> List[PromptCard]:
+    return [
+        PromptCard(category=item.category, content=item.content, cluster_id=item.cluster_id)
+        for item in retro_items
+    ]
+
+
+def collapse_clusters(cards: List[PromptCard]) -> List[PromptCard]:
+    """Replace the cards of each (category, cluster) by their first card, adding up the counts.
+
+    Boards that were never clustered have no more than one cluster and are
+    left as they are, and so are cards without a cluster. The order of first
+    appearance is preserved so an unchanged board always gives the same prompt.
+    """
+    if len({card.cluster_id for card in cards if card.cluster_id is not None}) < 2:
+        return cards
+
+    collapsed = []
+    clustered = {}
+    for card in cards:
+        if card.cluster_id is None:
+            collapsed.append(card)
+            continue
+        key = (card.category, card.cluster_id)
+        if key in clustered:
+            clustered[key].count += card.count
+        else:
+            clustered[key] = PromptCard(
+                category=card.category, content=card.content, count=card.count, cluster_id=card.cluster_id
+            )
+            collapsed.append(clustered[key])
+    return collapsed
+
+
+def chunk_cards(cards: List[PromptCard], max_tokens: int) -> List[List[PromptCard]]:
+    """Split cards into single-category chunks whose listing fits ``max_tokens``.
+
+    A card that is larger than the budget on its own gets a chunk of its own.
+    """
+    by_category = {}
+    for card in cards:
+        by_category.setdefault(card.category, []).append(card)
+
+    chunks = []
+    for category_cards in by_category.values():
+        chunk, tokens = [], 0
+        for card in category_cards:
+            card_tokens = estimate_tokens(card.line()) + 1
+            if chunk and tokens + card_tokens > max_tokens:
+                chunks.append(chunk)
+                chunk, tokens = [], 0
+            chunk.append(card)
+            tokens += card_tokens
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+
+def truncate_cards(cards: List[PromptCard], max_tokens: int) -> List[PromptCard]:
+    """Keep the leading cards whose listing fits ``max_tokens``."""
+    kept, tokens = [], 0
+    for card in cards:
+        tokens += estimate_tokens(card.line()) + 1
+        if tokens > max_tokens:
+            break
+        kept.append(card)
+    return kept
@@ -0,0 +1,70 @@
+"""
+Cache of validated LLM results for action item generation.
+
+Results are keyed on a digest of the model, the system prompt and the user
+prompt (which lists the retrospective items in order), so asking again for an
+unchanged board skips the LLM call. Entries expire after a TTL and the least
+recently used entry is evicted once the cache is full.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+
+from api.schemas import RetroItemList
+
+
+def prompt_digest(model: str, system_prompt: str, user_prompt: str) -> str:
+    """Return the cache key of one generation request."""
+    payload = json.dumps([model, system_prompt, user_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PromptResultCache:
+    """Thread-safe TTL + LRU cache of RetroItemList results."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[RetroItemList]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Stored as JSON so callers can't mutate the cached result
+        return RetroItemList.model_validate_json(payload)
+
+    def set(self, key: str, result: RetroItemList) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result.model_dump_json())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+prompt_result_cache = PromptResultCache(
+    max_entries=settings.GENAI_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.GENAI_CACHE_TTL,
+)
@@ -0,0 +1,110 @@
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from api.models import ActionItem, DeletedRow, Retrospective, RetrospectiveItem, Team, User, revisions_bumped
+from api.serializers import UserSerializer
+from api.services.board_cache import board_payload_cache
+from api.services.board_events import broadcast_item_deleted, broadcast_item_saved, item_retrospectives
+from api.services.cluster_retroitems import centroid_cache
+from api.services.embedding_store import invalidate_content
+
+
+@receiver(pre_save, sender=RetrospectiveItem)
+def invalidate_edited_item_embedding(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached embedding and centroids of an item when its content or category is edited."""
+    if instance.pk is None:
+        return
+    if update_fields is not None and not {'content', 'category'} & set(update_fields):
+        return
+
+    old = RetrospectiveItem.objects.filter(pk=instance.pk).values('content', 'category').first()
+    if old is None:
+        return
+    if old['content'] != instance.content:
+        invalidate_content(old['content'])
+    if old['content'] != instance.content or old['category'] != instance.category:
+        centroid_cache.forget(instance.retrospective_id)
+
+
+@receiver(post_delete, sender=RetrospectiveItem)
+def forget_deleted_item_centroids(sender, instance, **kwargs):
+    """Deleted items no longer belong to any cached centroid."""
+    centroid_cache.forget(instance.retrospective_id, instance.category)
+
+
+@receiver(post_save, sender=RetrospectiveItem)
+def broadcast_saved_item(sender, instance, created, **kwargs):
+    """Push created and edited items to everyone with the board open."""
+    item_retrospectives.remember(instance.pk, instance.retrospective_id)
+    broadcast_item_saved(instance, created)
+
+
+@receiver(post_delete, sender=RetrospectiveItem)
+def broadcast_deleted_item(sender, instance, **kwargs):
+    item_retrospectives.forget(instance.pk)
+    broadcast_item_deleted(instance)
+
+
+@receiver(post_delete, sender=RetrospectiveItem)
+@receiver(post_delete, sender=ActionItem)
+def record_deleted_board_row(sender, instance, origin=None, **kwargs):
+    """Leave a tombstone for rows deleted one by one or through a cascade, e.g. of their author.
+
+    Querysets of board rows record their deletes in bulk, and rows deleted with
+    their whole retrospective need no tombstone.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (sender, Retrospective, Team) and origin is not instance:
+        return
+    DeletedRow.objects.record(sender, [(instance.retrospective_id, instance.pk)])
+
+
+@receiver(revisions_bumped, sender=Retrospective)
+def invalidate_written_board_payloads(sender, statuses, **kwargs):
+    """Active boards are never cached, so only the others need to be dropped."""
+    board_payload_cache.invalidate(
+        retrospective_id for retrospective_id, status in statuses.items() if status != 'active'
+    )
+
+
+@receiver(post_save, sender=Retrospective)
+@receiver(post_delete, sender=Retrospective)
+def invalidate_board_payloads(sender, instance, **kwargs):
+    """Edits of the retrospective itself, like completing it, don't bump its revision."""
+    board_payload_cache.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Team)
+def bump_team_boards(sender, instance, created, **kwargs):
+    """Full retrospectives render their team, so editing it changes their boards."""
+    if not created:
+        Retrospective.objects.bump_revisions(instance.retrospectives.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def bump_boards_of_changed_members(sender, instance, action, reverse, pk_set, **kwargs):
+    """Full retrospectives render their team's members."""
+    if action in ('post_add', 'post_remove'):
+        team_ids = pk_set if reverse else {instance.pk}
+    elif action == 'pre_clear':
+        team_ids = set(instance.teams.values_list('id', flat=True)) if reverse else {instance.pk}
+    else:
+        return
+    if team_ids:
+        Retrospective.objects.bump_revisions(
+            Retrospective.objects.filter(team_id__in=team_ids).values_list('id', flat=True)
+        )
+
+
+@receiver(post_save, sender=User)
+def bump_boards_of_edited_user(sender, instance, created, update_fields=None, **kwargs):
+    """Edits of a user's profile change every board showing it; e.g. logins, which only set last_login, don't."""
+    if created or (update_fields is not None and not set(update_fields) & set(UserSerializer.Meta.fields)):
+        return
+    Retrospective.objects.bump_revisions(Retrospective.objects.ids_showing_user(instance.pk))
+
+
+@receiver(pre_delete, sender=User)
+def bump_boards_of_deleted_user(sender, instance, **kwargs):
+    """The user's cards and team memberships disappear with them, and assignments are cleared."""
+    Retrospective.objects.bump_revisions(Retrospective.objects.ids_showing_user(instance.pk))
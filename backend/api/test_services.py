@@ -0,0 +1,1023 @@
+import io
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import FakeTransformer
+
+
+class TestSentenceTransformerRegistry:
+    """Test cases for the process-wide model registry."""
+
+    def test_model_is_loaded_once(self):
+        """Test that repeated lookups reuse the same model instance."""
+        from api.services.model_registry import SentenceTransformerRegistry
+        loads = []
+
+        def loader(name):
+            loads.append(name)
+            return FakeTransformer(name)
+
+        registry = SentenceTransformerRegistry(loader=loader)
+        first = registry.get('model-a')
+        second = registry.get('model-a')
+
+        assert first is second
+        assert loads == ['model-a']
+
+    def test_models_are_keyed_by_name(self):
+        """Test that different model names get different instances."""
+        from api.services.model_registry import SentenceTransformerRegistry
+        registry = SentenceTransformerRegistry(loader=FakeTransformer)
+
+        assert registry.get('model-a') is not registry.get('model-b')
+
+    def test_concurrent_lookups_load_once(self):
+        """Test that threads racing on a cold registry only load the model once."""
+        from api.services.model_registry import SentenceTransformerRegistry
+        loads = []
+        barrier = threading.Barrier(8)
+
+        def loader(name):
+            loads.append(name)
+            return FakeTransformer(name)
+
+        registry = SentenceTransformerRegistry(loader=loader)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(registry.get('model-a'))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert loads == ['model-a']
+        assert all(result is results[0] for result in results)
+
+    def test_warm_up_records_metrics(self):
+        """Test that warm-up loads models and records load metrics."""
+        from api.services.model_registry import SentenceTransformerRegistry
+        registry = SentenceTransformerRegistry(loader=FakeTransformer)
+        registry.warm_up(['model-a'])
+
+        assert registry.is_loaded('model-a')
+        metrics = registry.metrics('model-a')
+        assert metrics.model_name == 'model-a'
+        assert metrics.load_seconds >= 0
+        assert metrics.rss_after_bytes > 0
+
+    @pytest.mark.parametrize('platform, expected', [('darwin', 4096), ('linux', 4096 * 1024)])
+    def test_peak_rss_fallback_units(self, monkeypatch, platform, expected):
+        """Test that the peak RSS fallback converts ru_maxrss to bytes per platform."""
+        import builtins
+        import resource
+        import sys
+        from api.services import model_registry
+
+        real_open = builtins.open
+
+        def no_proc_open(path, *args, **kwargs):
+            if path == '/proc/self/statm':
+                raise OSError('no /proc')
+            return real_open(path, *args, **kwargs)
+
+        monkeypatch.setitem(sys.modules, 'psutil', None)
+        monkeypatch.setattr(builtins, 'open', no_proc_open)
+        monkeypatch.setattr(resource, 'getrusage', lambda who: type('Usage', (), {'ru_maxrss': 4096})())
+        monkeypatch.setattr(model_registry.sys, 'platform', platform)
+
+        assert model_registry.current_rss_bytes() == expected
+
+    def test_clustering_services_share_model(self, monkeypatch):
+        """Test that ClusteringService instances borrow the registry's model."""
+        from api.services import cluster_retroitems
+        from api.services.model_registry import SentenceTransformerRegistry
+        registry = SentenceTransformerRegistry(loader=FakeTransformer)
+        monkeypatch.setattr(
+            cluster_retroitems, 'get_sentence_transformer', registry.get
+        )
+
+        first = cluster_retroitems.ClusteringService(transformer='model-a')
+        second = cluster_retroitems.ClusteringService(transformer='model-a')
+
+        assert first.transformer is second.transformer
+
+
+@pytest.mark.django_db
+class TestEmbeddingStore:
+    """Test cases for the persistent embedding cache."""
+
+    def test_cached_items_are_not_re_encoded(self, fake_transformer, retrospective):
+        """Test that only uncached content is sent to the transformer."""
+        from api.services.cluster_retroitems import ClusteringService
+        service = ClusteringService(transformer='fake')
+        items = service.get_retrospective_items(retrospective.id, 'start')
+
+        first = service.encode_retrospective_items(items)
+        second = service.encode_retrospective_items(items)
+
+        assert len(fake_transformer.encoded) == 2
+        assert first.dtype == np.float32
+        np.testing.assert_array_equal(first, second)
+
+    def test_duplicate_content_is_encoded_once(self, fake_transformer):
+        """Test that identical contents share one embedding."""
+        from api.services.embedding_store import EmbeddingStore
+        store = EmbeddingStore('fake', fake_transformer.encode)
+
+        vectors = store.get_embeddings(['same card', 'same card'])
+
+        assert fake_transformer.encoded == ['same card']
+        np.testing.assert_array_equal(vectors[0], vectors[1])
+
+    def test_editing_content_invalidates_embedding(self, fake_transformer, retrospective):
+        """Test that editing an item's content drops the stale embedding."""
+        from api.models import ItemEmbedding
+        from api.services.cluster_retroitems import ClusteringService
+        from api.services.embedding_store import content_hash
+        service = ClusteringService(transformer='fake')
+        service.encode_retrospective_items(service.get_retrospective_items(retrospective.id, 'stop'))
+
+        item = retrospective.items.get(category='stop')
+        old_hash = content_hash(item.content)
+        item.content = 'Stop skipping retros'
+        item.save()
+
+        assert not ItemEmbedding.objects.filter(content_hash=old_hash).exists()
+        service.encode_retrospective_items(service.get_retrospective_items(retrospective.id, 'stop'))
+        assert fake_transformer.encoded[-1] == 'Stop skipping retros'
+
+    def test_backfill_command(self, fake_transformer, retrospective):
+        """Test that the backfill command caches every item and prunes orphans."""
+        from django.core.management import call_command
+        from api.models import ItemEmbedding
+        ItemEmbedding.objects.create(transformer='fake', content_hash='0' * 64, dimensions=8, vector=b'')
+
+        call_command('backfill_embeddings', transformer='fake', batch_size=2, prune=True, stdout=io.StringIO())
+
+        assert ItemEmbedding.objects.filter(transformer='fake').count() == 3
+        assert not ItemEmbedding.objects.filter(content_hash='0' * 64).exists()
+
+
+@pytest.mark.django_db
+class TestIncrementalClustering:
+    """Test cases for assigning new items to existing clusters."""
+
+    def add_item(self, retrospective, content, category='start'):
+        from api.models import RetrospectiveItem
+        return RetrospectiveItem.objects.create(
+            retrospective=retrospective, category=category, content=content, author=retrospective.created_by
+        )
+
+    def test_first_assignment_refits_and_saves_labels(self, fake_transformer, retrospective):
+        """Test that a cold cache falls back to a full refit that persists every label."""
+        from api.services.cluster_retroitems import ClusteringService
+        item = self.add_item(retrospective, 'Start pairing on reviews')
+
+        cluster_id = ClusteringService(transformer='fake').assign_item_cluster(item)
+
+        items = {i.content: i.cluster_id for i in retrospective.items.filter(category='start')}
+        assert cluster_id == items['Start pairing on reviews']
+        assert len(set(items.values())) == 2
+
+    def test_similar_item_joins_existing_cluster(self, fake_transformer, retrospective, monkeypatch):
+        """Test that an item close to a centroid gets that cluster without a refit."""
+        from api.services.cluster_retroitems import ClusteringService
+        service = ClusteringService(transformer='fake')
+        labels = service.refit_category(retrospective.id, 'start')
+        existing = retrospective.items.get(content='Start writing more tests')
+
+        item = self.add_item(retrospective, 'Start writing more tests')
+
+        def unexpected_refit(*args):
+            raise AssertionError('unexpected refit')
+
+        monkeypatch.setattr(service, 'refit_category', unexpected_refit)
+        cluster_id = service.assign_item_cluster(item)
+
+        assert cluster_id == labels[existing.id]
+        item.refresh_from_db()
+        assert item.cluster_id == cluster_id
+
+    def test_distant_item_opens_new_cluster(self, fake_transformer, retrospective):
+        """Test that an item far from every centroid opens a new cluster."""
+        from api.services.cluster_retroitems import ClusteringService
+        service = ClusteringService(transformer='fake')
+        labels = service.refit_category(retrospective.id, 'start')
+
+        item = self.add_item(retrospective, 'Start celebrating releases')
+        cluster_id = service.assign_item_cluster(item)
+
+        assert cluster_id == max(labels.values()) + 1
+
+    def test_drift_triggers_refit(self, fake_transformer, retrospective, monkeypatch):
+        """Test that moving a centroid beyond the drift threshold refits the category."""
+        from api.services.cluster_retroitems import ClusteringService
+        service = ClusteringService(transformer='fake', eps=100.0, drift_threshold=0.01)
+        service.refit_category(retrospective.id, 'start')
+        refits = []
+        original_refit = service.refit_category
+
+        def spy(retrospective_id, category):
+            refits.append((retrospective_id, category))
+            return original_refit(retrospective_id, category)
+
+        monkeypatch.setattr(service, 'refit_category', spy)
+        item = self.add_item(retrospective, 'Start celebrating releases')
+        service.assign_item_cluster(item)
+
+        assert refits == [(retrospective.id, 'start')]
+
+
+    def test_own_assignments_keep_the_cache(self, fake_transformer, retrospective, monkeypatch):
+        """Test that labels this process saves don't make its cached centroids look stale."""
+        from api.services.cluster_retroitems import ClusteringService
+        service = ClusteringService(transformer='fake')
+        service.refit_category(retrospective.id, 'start')
+
+        def unexpected_refit(*args):
+            raise AssertionError('unexpected refit')
+
+        monkeypatch.setattr(service, 'refit_category', unexpected_refit)
+        first = service.assign_item_cluster(self.add_item(retrospective, 'Start celebrating releases'))
+        second = service.assign_item_cluster(self.add_item(retrospective, 'Start celebrating releases'))
+
+        assert second == first
+
+    def test_labels_written_elsewhere_force_a_refit(self, fake_transformer, retrospective, monkeypatch):
+        """Test that cached centroids are not used once another process has written labels."""
+        from api.models import RetrospectiveItem
+        from api.services.cluster_retroitems import ClusteringService
+        service = ClusteringService(transformer='fake')
+        labels = service.refit_category(retrospective.id, 'start')
+        refits = []
+        original_refit = service.refit_category
+
+        def spy(retrospective_id, category):
+            refits.append((retrospective_id, category))
+            return original_refit(retrospective_id, category)
+
+        monkeypatch.setattr(service, 'refit_category', spy)
+        # Another worker opens a cluster without this process' signals noticing
+        other = self.add_item(retrospective, 'Start celebrating releases')
+        RetrospectiveItem.objects.filter(pk=other.pk).update(cluster_id=max(labels.values()) + 1)
+
+        item = self.add_item(retrospective, 'Start writing more tests')
+        service.assign_item_cluster(item)
+
+        assert refits == [(retrospective.id, 'start')]
+
+
+@pytest.mark.django_db
+class TestClusterRetrospective:
+    """Test cases for clustering a whole retrospective."""
+
+    def test_counts_per_category(self, fake_transformer, retrospective):
+        """Test that every category is clustered and counted."""
+        from api.services.cluster_retroitems import ClusteringService
+
+        counts = ClusteringService(transformer='fake').cluster_retrospective(retrospective.id)
+
+        assert counts == {'start': {0: 1, 1: 1}, 'stop': {0: 1}}
+
+    def test_labels_are_written_in_one_update(self, fake_transformer, retrospective, django_assert_num_queries):
+        """Test that cached embeddings and one bulk update are all clustering needs."""
+        from api.services.cluster_retroitems import ClusteringService
+        ClusteringService(transformer='fake').cluster_retrospective(retrospective.id)
+
+        # exists check, items, embeddings, then savepoint + revision bump and read + UPDATE + release
+        with django_assert_num_queries(8):
+            ClusteringService(transformer='fake').cluster_retrospective(retrospective.id)
+
+    def test_missing_retrospective(self, fake_transformer):
+        """Test that clustering an unknown retrospective raises ValueError."""
+        from api.services.cluster_retroitems import ClusteringService
+
+        with pytest.raises(ValueError):
+            ClusteringService(transformer='fake').cluster_retrospective(99999)
+
+    def test_batch_encodes_all_retrospectives_together(self, fake_transformer, retrospective, monkeypatch):
+        """Test that a batch job encodes every retrospective in a single transformer call."""
+        from api.models import Retrospective, RetrospectiveItem
+        from api.services.cluster_retroitems import ClusteringService
+        other = Retrospective.objects.create(title='Other Retrospective')
+        RetrospectiveItem.objects.create(
+            retrospective=other, category='bad', content='Flaky CI', author=retrospective.created_by
+        )
+        calls = []
+        original_encode = fake_transformer.encode
+
+        def encode(contents, **kwargs):
+            calls.append(kwargs)
+            return original_encode(contents)
+
+        monkeypatch.setattr(fake_transformer, 'encode', encode)
+        counts = ClusteringService(transformer='fake', batch_size=16).cluster_retrospectives(
+            [retrospective.id, other.id]
+        )
+
+        assert calls == [{'batch_size': 16}]
+        assert counts == {
+            retrospective.id: {'start': {0: 1, 1: 1}, 'stop': {0: 1}},
+            other.id: {'bad': {0: 1}},
+        }
+
+    def test_cluster_retrospectives_command(self, fake_transformer, retrospective):
+        """Test that the management command clusters the selected retrospectives."""
+        from django.core.management import call_command
+        output = io.StringIO()
+
+        call_command('cluster_retrospectives', retrospective_ids=[retrospective.id], stdout=output)
+
+        assert 'Clustered 1 of 1 retrospectives' in output.getvalue()
+        assert retrospective.items.get(content='Start writing more tests').cluster_id == 1
+
+
+@pytest.mark.django_db
+class TestClusterRepresentatives:
+    """Test cases for prompts built from one card per cluster."""
+
+    @pytest.fixture
+    def board(self, retrospective):
+        from api.models import RetrospectiveItem
+        for content, cluster_id in [('Deploys fail', 0), ('Flaky CI', 0), ('Flaky CI', 0), ('Slow laptops', 1)]:
+            RetrospectiveItem.objects.create(
+                retrospective=retrospective, author=retrospective.created_by,
+                category='bad', content=content, cluster_id=cluster_id,
+            )
+        return retrospective
+
+    def test_medoid_and_size_per_cluster(self, fake_transformer, board):
+        """Test that saved clusters are reused and unclustered categories are fitted without saving."""
+        from api.services.cluster_retroitems import ClusteringService
+
+        representatives = ClusteringService(transformer='fake').cluster_representatives(board.id)
+
+        assert [(item.category, item.content, count) for item, count in representatives] == [
+            ('start', 'Start pairing on reviews', 1),
+            ('start', 'Start writing more tests', 1),
+            ('stop', 'Stop meetings without agendas', 1),
+            ('bad', 'Flaky CI', 3),
+            ('bad', 'Slow laptops', 1),
+        ]
+        assert set(board.items.filter(category='start').values_list('cluster_id', flat=True)) == {None}
+
+    def test_cards_added_after_clustering_are_listed(self, fake_transformer, board):
+        """Test that cards without a cluster are not merged into cluster 0."""
+        from api.models import RetrospectiveItem
+        from api.services.cluster_retroitems import ClusteringService
+        RetrospectiveItem.objects.create(
+            retrospective=board, author=board.created_by, category='bad', content='Printer is broken'
+        )
+
+        representatives = ClusteringService(transformer='fake').cluster_representatives(board.id)
+
+        assert [(item.content, count) for item, count in representatives if item.category == 'bad'] == [
+            ('Flaky CI', 3),
+            ('Slow laptops', 1),
+            ('Printer is broken', 1),
+        ]
+
+    def test_prompt_lists_one_card_per_cluster(self, fake_transformer, board, monkeypatch):
+        """Test that GenAIService with cluster_prompts sends representatives with counts."""
+        from api.services import generate_actionitems
+        from api.services.generate_actionitems import GenAIService
+        prompts = []
+
+        class FakeClient:
+            def chat(self, messages, **kwargs):
+                prompts.append(messages[1]['content'])
+                return {'message': {'content': '{"retro_items": [{"content": "Fix CI", "category": "actions"}]}'}}
+
+        monkeypatch.setattr(generate_actionitems, 'get_ollama_client', lambda host, timeout: FakeClient())
+
+        GenAIService(cluster_prompts=True).generate_retrospective_items(board.id)
+
+        assert '- BAD: Flaky CI (x3)' in prompts[0]
+        assert 'Deploys fail' not in prompts[0]
+
+
+class TestCosineSimilarity:
+    """Test cases for the cosine similarity helper."""
+
+    def test_similarity_matrix(self):
+        """Test similarities of parallel, orthogonal and opposite vectors."""
+        from api.services.cluster_retroitems import cosine_similarity_matrix
+        a = np.array([[1.0, 0.0]])
+        b = np.array([[2.0, 0.0], [0.0, 3.0], [-1.0, 0.0], [0.0, 0.0]])
+
+        np.testing.assert_allclose(cosine_similarity_matrix(a, b), [[1.0, 0.0, -1.0, 0.0]])
+
+
+class TestClusteringEngines:
+    """Test cases for the pluggable clustering engines."""
+
+    @pytest.fixture
+    def blobs(self):
+        """Two tight, well separated groups of vectors."""
+        rng = np.random.default_rng(0)
+        first = rng.normal(0.0, 0.05, size=(5, 4))
+        second = rng.normal(5.0, 0.05, size=(5, 4))
+        return np.vstack([first, second])[[0, 5, 1, 6, 2, 7, 3, 8, 4, 9]]
+
+    @pytest.mark.parametrize('name', ['dbscan', 'agglomerative', 'leader'])
+    def test_engines_find_separated_groups(self, name, blobs):
+        """Test that every engine separates two distant groups, labelled in order of appearance."""
+        from api.services.clustering_engines import get_clustering_engine
+
+        labels = get_clustering_engine(name, threshold=1.0).fit_predict(blobs)
+
+        assert labels.tolist() == [0, 1] * 5
+
+    @pytest.mark.parametrize('name', ['dbscan', 'agglomerative', 'leader'])
+    def test_engines_handle_single_item(self, name):
+        """Test that a single item gets cluster 0."""
+        from api.services.clustering_engines import get_clustering_engine
+
+        assert get_clustering_engine(name).fit_predict(np.ones((1, 4))).tolist() == [0]
+
+    def test_unknown_engine(self):
+        """Test that an unknown engine name raises ValueError."""
+        from api.services.clustering_engines import get_clustering_engine
+
+        with pytest.raises(ValueError):
+            get_clustering_engine('kmeans')
+
+
+@pytest.mark.django_db
+class TestGenAIJobQueue:
+    """Test cases for the bounded GenAI job queue."""
+
+    class RecordingExecutor:
+        """Executor that accepts work without running it, so queue slots stay taken."""
+
+        def __init__(self):
+            self.submitted = []
+
+        def submit(self, fn, *args):
+            self.submitted.append(args)
+
+    def test_queue_rejects_jobs_beyond_capacity(self, retrospective, django_capture_on_commit_callbacks):
+        """Test that jobs beyond workers plus pending slots are marked failed."""
+        from api.models import GenAIJob
+        from api.services.genai_jobs import GenAIJobQueue
+        queue = GenAIJobQueue(max_workers=1, max_pending=1, run_inline=False)
+        queue._executor = self.RecordingExecutor()
+
+        jobs = [GenAIJob.objects.create(retrospective=retrospective) for _ in range(3)]
+        with django_capture_on_commit_callbacks(execute=True):
+            for job in jobs:
+                queue.submit(job)
+
+        assert [args[0] for args in queue._executor.submitted] == [jobs[0].id, jobs[1].id]
+        jobs[2].refresh_from_db()
+        assert jobs[2].status == 'failed'
+        assert 'Too many' in jobs[2].error
+
+    def test_rolled_back_job_takes_no_slot(self, retrospective, django_capture_on_commit_callbacks):
+        """Test that a job whose transaction rolls back never takes a queue slot."""
+        from django.db import transaction
+        from api.models import GenAIJob
+        from api.services.genai_jobs import GenAIJobQueue
+        queue = GenAIJobQueue(max_workers=1, max_pending=0, run_inline=False)
+        queue._executor = self.RecordingExecutor()
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    queue.submit(GenAIJob.objects.create(retrospective=retrospective))
+                    raise RuntimeError('rolled back')
+            except RuntimeError:
+                pass
+        assert callbacks == []
+
+        job = GenAIJob.objects.create(retrospective=retrospective)
+        with django_capture_on_commit_callbacks(execute=True):
+            queue.submit(job)
+        assert queue._executor.submitted == [(job.id, False, False)]
+
+    def test_superseded_job_is_not_run(self, retrospective, monkeypatch):
+        """Test that a job that is no longer pending is skipped by its worker."""
+        from api.models import GenAIJob
+        from api.services.generate_actionitems import GenAIService
+        from api.services.genai_jobs import run_genai_job
+
+        def unexpected_generation(service, retrospective_id, force=False, before_save=None):
+            raise AssertionError('superseded jobs must not generate')
+
+        monkeypatch.setattr(GenAIService, 'create_retrospective_items_from_ai', unexpected_generation)
+        job = GenAIJob.objects.create(retrospective=retrospective, status='failed', error='Superseded')
+
+        run_genai_job(job.id)
+
+        job.refresh_from_db()
+        assert job.status == 'failed'
+        assert job.error == 'Superseded'
+
+    def test_stale_job_is_replaced(self, retrospective, settings, monkeypatch):
+        """Test that a job left running by a dead worker doesn't block new generations."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from api.models import GenAIJob
+        from api.services.generate_actionitems import GenAIService
+        from api.services.genai_jobs import enqueue_genai_job
+        settings.GENAI_JOBS_RUN_INLINE = True
+        settings.GENAI_JOB_TIMEOUT = 60
+        monkeypatch.setattr(GenAIService, 'create_retrospective_items_from_ai', lambda *args, **kwargs: [])
+        stale = GenAIJob.objects.create(
+            retrospective=retrospective, status='running', started_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        job = enqueue_genai_job(retrospective.id)
+
+        assert job.id != stale.id
+        assert job.status == 'succeeded'
+        stale.refresh_from_db()
+        assert stale.status == 'failed'
+        assert stale.finished_at is not None
+
+    def test_force_supersedes_unfinished_job(self, retrospective, settings, monkeypatch):
+        """Test that a forced regeneration replaces a job that is still running."""
+        from django.utils import timezone
+        from api.models import GenAIJob
+        from api.services.generate_actionitems import GenAIService
+        from api.services.genai_jobs import enqueue_genai_job
+        settings.GENAI_JOBS_RUN_INLINE = True
+        forced = []
+        monkeypatch.setattr(
+            GenAIService, 'create_retrospective_items_from_ai',
+            lambda service, retrospective_id, force=False, before_save=None: forced.append(force) or []
+        )
+        running = GenAIJob.objects.create(retrospective=retrospective, status='running', started_at=timezone.now())
+
+        job = enqueue_genai_job(retrospective.id, force=True)
+
+        assert job.id != running.id
+        assert forced == [True]
+        running.refresh_from_db()
+        assert running.status == 'failed'
+
+    @pytest.mark.parametrize('stream', [False, True])
+    def test_superseded_running_job_discards_its_items(self, retrospective, settings, monkeypatch, stream):
+        """Test that a job superseded by a forced regeneration while it runs saves nothing."""
+        from types import SimpleNamespace
+        from django.contrib.auth import get_user_model
+        from django.utils import timezone
+        from api.models import GenAIJob
+        from api.services.generate_actionitems import GenAIService
+        from api.services.genai_jobs import enqueue_genai_job, run_genai_job
+        settings.GENAI_JOBS_RUN_INLINE = True
+        get_user_model().objects.create_user(
+            username='gen_ai_serviceuser', email='genai@retrospectives.local', password=None
+        )
+        first = GenAIJob.objects.create(retrospective=retrospective, started_at=timezone.now())
+        forced = []
+
+        def generate(service, retrospective_id, force=False):
+            if not force:
+                # Someone forces a regeneration while the first job is still waiting for the model
+                forced.append(enqueue_genai_job(retrospective_id, force=True))
+            return [SimpleNamespace(content='Timebox meetings', category='actions')]
+
+        monkeypatch.setattr(GenAIService, 'generate_retrospective_items', generate)
+        monkeypatch.setattr(GenAIService, 'stream_retrospective_items', generate)
+
+        run_genai_job(first.id, stream=stream)
+
+        first.refresh_from_db()
+        assert first.status == 'failed'
+        assert first.error == 'Superseded by a forced regeneration'
+        assert forced[0].status == 'succeeded'
+        assert retrospective.items.filter(content='Timebox meetings').count() == 1
+
+    def test_failed_generation_is_recorded(self, retrospective, monkeypatch):
+        """Test that errors from the AI service end up on the job."""
+        from api.models import GenAIJob
+        from api.services.generate_actionitems import GenAIService
+        from api.services.genai_jobs import run_genai_job
+
+        def failing_generation(service, retrospective_id, force=False, before_save=None):
+            raise ValueError('AI response is not valid JSON')
+
+        monkeypatch.setattr(GenAIService, 'create_retrospective_items_from_ai', failing_generation)
+        job = GenAIJob.objects.create(retrospective=retrospective)
+
+        run_genai_job(job.id)
+
+        job.refresh_from_db()
+        assert job.status == 'failed'
+        assert job.error == 'AI response is not valid JSON'
+        assert job.finished_at is not None
+
+
+class TestRetroItemStreamParser:
+    """Test cases for parsing RetroItems out of a streamed completion."""
+
+    def test_items_are_emitted_as_they_complete(self):
+        """Test that each item is returned by the chunk that closes it."""
+        from api.services.generate_actionitems import RetroItemStreamParser
+        completion = (
+            '{"retro_items": [{"content": "Use {braces} and \\"quotes\\"", "category": "actions"}, '
+            '{"content": "Timebox meetings", "category": "actions"}]}'
+        )
+        parser = RetroItemStreamParser()
+
+        emitted = [(index, item.content) for index, char in enumerate(completion) for item in parser.feed(char)]
+
+        first_end = completion.index('}, ')
+        assert emitted == [
+            (first_end, 'Use {braces} and "quotes"'),
+            (len(completion) - 3, 'Timebox meetings'),
+        ]
+
+    def test_bare_list(self):
+        """Test that a top-level list of items is parsed too."""
+        from api.services.generate_actionitems import RetroItemStreamParser
+        parser = RetroItemStreamParser()
+
+        items = parser.feed('[{"content": "Pair more", "category": "actions"}, {"content": "Ship sm')
+        items += parser.feed('aller PRs", "category": "actions"}]')
+
+        assert [item.content for item in items] == ['Pair more', 'Ship smaller PRs']
+
+    def test_malformed_items_are_skipped(self):
+        """Test that an item failing validation doesn't stop the stream."""
+        from api.services.generate_actionitems import RetroItemStreamParser
+        parser = RetroItemStreamParser()
+
+        items = parser.feed('{"retro_items": [{"category": "actions"}, {"content": "Ok", "category": "actions"}]}')
+
+        assert [item.content for item in items] == ['Ok']
+
+
+class TestOllamaClients:
+    """Test cases for the pooled Ollama clients."""
+
+    def test_clients_are_reused_per_host_and_timeout(self):
+        """Test that the same host and timeout share one client."""
+        from api.services.ollama_clients import close_ollama_clients, get_ollama_client
+        try:
+            first = get_ollama_client('127.0.0.1:11434', 30.0)
+
+            assert get_ollama_client('127.0.0.1:11434', 30.0) is first
+            assert get_ollama_client('127.0.0.1:11434', 60.0) is not first
+            assert get_ollama_client('10.0.0.2:11434', 30.0) is not first
+        finally:
+            close_ollama_clients()
+
+    def test_generation_does_not_touch_environment(self, monkeypatch):
+        """Test that calling the model no longer rewrites OLLAMA_HOST."""
+        import os
+        from api.services import generate_actionitems
+        from api.services.generate_actionitems import GenAIService
+        monkeypatch.delenv('OLLAMA_HOST', raising=False)
+        hosts = []
+
+        class FakeClient:
+            def chat(self, **kwargs):
+                hosts.append(os.environ.get('OLLAMA_HOST'))
+                return {'message': {'content': '{"retro_items": []}'}}
+
+        monkeypatch.setattr(generate_actionitems, 'get_ollama_client', lambda host, timeout: FakeClient())
+        monkeypatch.setattr(
+            GenAIService, 'get_retrospective_items',
+            lambda self, retrospective_id: [generate_actionitems.RetroItem(content='Flaky CI', category='bad')]
+        )
+
+        GenAIService(ollama_host='10.0.0.2:11434').generate_retrospective_items(1)
+
+        assert hosts == [None]
+        assert 'OLLAMA_HOST' not in os.environ
+
+
+class TestPromptResultCache:
+    """Test cases for the LLM prompt result cache."""
+
+    def result(self, content):
+        from api.schemas import RetroItem, RetroItemList
+        return RetroItemList(retro_items=[RetroItem(content=content, category='actions')])
+
+    def test_digest_depends_on_model_and_prompts(self):
+        """Test that changing any part of the request changes the key."""
+        from api.services.prompt_cache import prompt_digest
+        digest = prompt_digest('mistral', 'system', 'items')
+
+        assert digest == prompt_digest('mistral', 'system', 'items')
+        assert digest != prompt_digest('llama3', 'system', 'items')
+        assert digest != prompt_digest('mistral', 'other system', 'items')
+        assert digest != prompt_digest('mistral', 'system', 'other items')
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache keeps at most max_entries, dropping the least recently used."""
+        from api.services.prompt_cache import PromptResultCache
+        cache = PromptResultCache(max_entries=2, ttl_seconds=60)
+        cache.set('a', self.result('A'))
+        cache.set('b', self.result('B'))
+        cache.get('a')
+        cache.set('c', self.result('C'))
+
+        assert cache.get('b') is None
+        assert cache.get('a').retro_items[0].content == 'A'
+        assert cache.get('c').retro_items[0].content == 'C'
+
+    def test_entries_expire(self, monkeypatch):
+        """Test that entries older than the TTL are dropped."""
+        from api.services import prompt_cache
+        now = [1000.0]
+        monkeypatch.setattr(prompt_cache.time, 'monotonic', lambda: now[0])
+        cache = prompt_cache.PromptResultCache(max_entries=2, ttl_seconds=60)
+        cache.set('a', self.result('A'))
+
+        now[0] += 61
+
+        assert cache.get('a') is None
+
+    @pytest.mark.django_db
+    def test_repeat_generation_skips_llm_unless_forced(self, retrospective, monkeypatch):
+        """Test that an unchanged board is only sent to the LLM again with force=True."""
+        from api.services import generate_actionitems
+        from api.services.generate_actionitems import GenAIService
+        calls = []
+
+        class FakeClient:
+            def chat(self, **kwargs):
+                calls.append(kwargs)
+                return {'message': {'content': '{"retro_items": [{"content": "Timebox", "category": "actions"}]}'}}
+
+        monkeypatch.setattr(generate_actionitems, 'get_ollama_client', lambda host, timeout: FakeClient())
+        service = GenAIService()
+
+        first = service.generate_retrospective_items(retrospective.id)
+        second = service.generate_retrospective_items(retrospective.id)
+        assert len(calls) == 1
+        assert first == second
+
+        service.generate_retrospective_items(retrospective.id, force=True)
+        assert len(calls) == 2
+
+    @pytest.mark.django_db
+    def test_saved_action_items_do_not_change_the_prompt(self, retrospective, monkeypatch):
+        """Test that generating again after saving the result still hits the cache."""
+        from django.contrib.auth import get_user_model
+        from api.models import RetrospectiveItem
+        from api.services import generate_actionitems
+        from api.services.generate_actionitems import GenAIService
+        get_user_model().objects.create_user(
+            username='gen_ai_serviceuser', email='genai@retrospectives.local', password=None
+        )
+        prompts = []
+
+        class FakeClient:
+            def chat(self, messages, **kwargs):
+                prompts.append(messages[1]['content'])
+                return {'message': {'content': '{"retro_items": [{"content": "Timebox", "category": "actions"}]}'}}
+
+        monkeypatch.setattr(generate_actionitems, 'get_ollama_client', lambda host, timeout: FakeClient())
+        service = GenAIService()
+
+        service.create_retrospective_items_from_ai(retrospective.id)
+        # A participant's own card in the actions square is not generated from either
+        RetrospectiveItem.objects.create(
+            retrospective=retrospective, category='actions', content='Buy a timer', author=retrospective.created_by
+        )
+        service.create_retrospective_items_from_ai(retrospective.id)
+
+        assert len(prompts) == 1
+        assert 'Timebox' not in prompts[0]
+        assert retrospective.items.filter(content='Timebox').count() == 2
+
+
+@pytest.mark.django_db
+class TestCreateRetrospectiveItemsFromAI:
+    """Test cases for saving generated items."""
+
+    @pytest.fixture
+    def generated(self, monkeypatch):
+        from api.schemas import RetroItem
+        from api.services.generate_actionitems import GenAIService
+        items = [RetroItem(content=f'Action {index}', category='actions') for index in range(5)]
+        monkeypatch.setattr(
+            GenAIService, 'generate_retrospective_items', lambda self, retrospective_id, force=False: items
+        )
+        return items
+
+    def test_items_are_bulk_created(self, retrospective, generated, django_assert_num_queries):
+        """Test that generated items are inserted in one statement."""
+        from django.contrib.auth import get_user_model
+        from api.services.generate_actionitems import GenAIService
+        service_user = get_user_model().objects.create_user(
+            username='gen_ai_serviceuser', email='genai@retrospectives.local', password=None
+        )
+        service = GenAIService()
+        service.create_retrospective_items_from_ai(retrospective.id)
+
+        # savepoint, service user, revision bump and read, INSERT, release savepoint: no retrospective lookup
+        with django_assert_num_queries(6):
+            created = service.create_retrospective_items_from_ai(retrospective.id)
+
+        assert [item.content for item in created] == [f'Action {index}' for index in range(5)]
+        assert all(item.pk is not None and item.author_id == service_user.id for item in created)
+        assert [item.x_minimized for item in created] == [0, 100, 200, 300, 400]
+
+    def test_recreated_service_user_is_picked_up(self, retrospective, generated, monkeypatch):
+        """Test that an insert failing on a recreated service user is retried with the new user."""
+        from django.contrib.auth import get_user_model
+        from django.db import IntegrityError
+        from api.models import BoardRowQuerySet
+        from api.services.generate_actionitems import GenAIService
+        User = get_user_model()
+        User.objects.create_user(username='gen_ai_serviceuser', email='genai@retrospectives.local', password=None)
+        service = GenAIService()
+        service.create_retrospective_items_from_ai(retrospective.id)
+
+        # What create_genai_user --force does from another process
+        User.objects.filter(username='gen_ai_serviceuser').delete()
+        recreated = User.objects.create_user(
+            username='gen_ai_serviceuser', email='genai@retrospectives.local', password=None
+        )
+        original_bulk_create = BoardRowQuerySet.bulk_create
+        failures = []
+
+        def bulk_create_failing_once(queryset, objs, *args, **kwargs):
+            if not failures:
+                failures.append(objs)
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            return original_bulk_create(queryset, objs, *args, **kwargs)
+
+        monkeypatch.setattr(BoardRowQuerySet, 'bulk_create', bulk_create_failing_once)
+        created = service.create_retrospective_items_from_ai(retrospective.id)
+
+        assert len(failures) == 1
+        assert all(item.author_id == recreated.id for item in created)
+
+
+class TestPromptBuilder:
+    """Test cases for token-budgeted prompt construction."""
+
+    def test_clustered_cards_are_collapsed(self):
+        """Test that cards sharing a category and cluster become one line with a count."""
+        from api.schemas import RetroItem
+        from api.services.prompt_builder import collapse_clusters, format_cards, to_cards
+        cards = collapse_clusters(to_cards([
+            RetroItem(content='Flaky CI', category='bad', cluster_id=0),
+            RetroItem(content='Pairing', category='good', cluster_id=0),
+            RetroItem(content='CI is red again', category='bad', cluster_id=0),
+            RetroItem(content='Flaky tests', category='bad', cluster_id=1),
+        ]))
+
+        assert format_cards(cards) == '- BAD: Flaky CI (x2)\n- GOOD: Pairing\n- BAD: Flaky tests'
+
+    def test_unclustered_board_is_not_collapsed(self):
+        """Test that a board with every card in the default cluster keeps all cards."""
+        from api.schemas import RetroItem
+        from api.services.prompt_builder import collapse_clusters, to_cards
+        items = [RetroItem(content=f'Card {index}', category='bad', cluster_id=0) for index in range(3)]
+
+        assert [card.content for card in collapse_clusters(to_cards(items))] == ['Card 0', 'Card 1', 'Card 2']
+
+    def test_chunks_stay_within_budget_and_category(self):
+        """Test that chunks never mix categories or exceed the token budget."""
+        from api.services.prompt_builder import PromptCard, chunk_cards, estimate_tokens, format_cards
+        cards = [PromptCard(category=category, content='x' * 38) for category in ('start', 'stop') for _ in range(10)]
+
+        chunks = chunk_cards(cards, max_tokens=50)
+
+        assert sum(len(chunk) for chunk in chunks) == 20
+        assert all(len({card.category for card in chunk}) == 1 for chunk in chunks)
+        assert all(estimate_tokens(format_cards(chunk)) <= 50 for chunk in chunks)
+
+    @pytest.mark.django_db
+    def test_oversized_board_is_map_reduced(self, retrospective, monkeypatch):
+        """Test that a board over budget is summarized per category before generation."""
+        import json
+        from api.models import RetrospectiveItem
+        from api.services import generate_actionitems
+        from api.services.generate_actionitems import GenAIService
+        from api.schemas import SYSTEM_PROMPT_SUMMARIZE_ITEMS
+        RetrospectiveItem.objects.bulk_create([
+            RetrospectiveItem(
+                retrospective=retrospective, author=retrospective.created_by, category='bad',
+                content=f'Card number {index} ' * 5,
+            )
+            for index in range(200)
+        ])
+        prompts = []
+
+        class FakeClient:
+            def chat(self, model, messages, **kwargs):
+                system, user = messages[0]['content'], messages[1]['content']
+                prompts.append((system, user))
+                items = [{'content': 'Theme', 'category': 'ignored'}]
+                if system != SYSTEM_PROMPT_SUMMARIZE_ITEMS:
+                    items = [{'content': 'Fix the board', 'category': 'actions'}]
+                return {'message': {'content': json.dumps({'retro_items': items})}}
+
+        monkeypatch.setattr(generate_actionitems, 'get_ollama_client', lambda host, timeout: FakeClient())
+        service = GenAIService(max_prompt_tokens=1000)
+
+        result = service.generate_retrospective_items(retrospective.id)
+
+        summaries = [user for system, user in prompts if system == SYSTEM_PROMPT_SUMMARIZE_ITEMS]
+        final_prompt = prompts[-1][1]
+        assert [item.content for item in result] == ['Fix the board']
+        assert len(summaries) > 2
+        assert all(len(user) <= 4000 for _, user in prompts)
+        assert '- BAD: Theme' in final_prompt and '- START: Theme' in final_prompt
+
+
+class TestPositionCoalescer:
+    """Test cases for coalescing rapid card moves."""
+
+    def test_moves_during_a_write_are_coalesced(self):
+        """Test that moves arriving while a card is written are merged into one follow-up write."""
+        import threading
+        from api.services.item_positions import PositionCoalescer
+        writes = []
+        writing = threading.Event()
+        release = threading.Event()
+
+        def writer(item_id, position):
+            writes.append((item_id, dict(position)))
+            if len(writes) == 1:
+                writing.set()
+                release.wait(timeout=5)
+            return True
+
+        coalescer = PositionCoalescer(writer)
+        first = threading.Thread(target=coalescer.submit, args=(1, {'x_minimized': 1, 'y_minimized': 1}))
+        first.start()
+        assert writing.wait(timeout=5)
+
+        assert coalescer.submit(1, {'x_minimized': 2, 'y_minimized': 2})
+        assert coalescer.submit(1, {'x_minimized': 3})
+        release.set()
+        first.join(timeout=5)
+
+        assert writes == [(1, {'x_minimized': 1, 'y_minimized': 1}), (1, {'x_minimized': 3, 'y_minimized': 2})]
+
+        coalescer.submit(1, {'x_minimized': 4})
+        assert writes[-1] == (1, {'x_minimized': 4})
+
+
+@pytest.mark.django_db
+class TestBoardEvents:
+    """Test cases for broadcasting board changes."""
+
+    def test_clustering_broadcasts_new_cluster_ids(
+        self, fake_transformer, retrospective, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        """Test that re-clustering a board sends the new cluster id of every item once committed."""
+        from api.services import board_events
+        from api.services.cluster_retroitems import ClusteringService
+        sent = []
+        monkeypatch.setattr(board_events, 'send_board_event', lambda *args: sent.append(args))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ClusteringService(transformer='fake').cluster_retrospective(retrospective.id)
+            assert sent == []
+
+        clusters = {str(item.id): item.cluster_id for item in retrospective.items.all()}
+        assert sent == [(retrospective.id, {'type': 'items.clustered', 'clusters': clusters})]
+
+    def test_item_retrospective_cache_is_bounded(self, retrospective, django_assert_num_queries):
+        """Test that saved items are remembered, old entries evicted and unknown items looked up."""
+        from api.services.board_events import ItemRetrospectiveCache
+        first, second, third = retrospective.items.order_by('id')
+        cache = ItemRetrospectiveCache(max_entries=2)
+        cache.remember(first.id, retrospective.id)
+        cache.remember(second.id, retrospective.id)
+        cache.remember(third.id, retrospective.id)
+
+        with django_assert_num_queries(0):
+            assert cache.get(third.id) == retrospective.id
+        with django_assert_num_queries(1):
+            assert cache.get(first.id) == retrospective.id
+        with django_assert_num_queries(1):
+            assert cache.get(999999) is None
+
+
+@pytest.mark.django_db
+class TestBoardPayloadCache:
+    """Test cases for the cache of rendered boards."""
+
+    def test_payloads_rendered_before_a_write_are_never_served(self):
+        """Test that a payload stored under a dropped generation can't be read back."""
+        from api.services.board_cache import board_payload_cache
+        token, payload = board_payload_cache.get(1, 'json')
+        assert payload is None
+
+        # A reader renders the board while a write invalidates it, then stores its stale payload
+        board_payload_cache.invalidate([1])
+        board_payload_cache.set(1, token, 'json', {'content': b'stale'})
+
+        new_token, payload = board_payload_cache.get(1, 'json')
+        assert payload is None and new_token != token
+
+        board_payload_cache.set(1, new_token, 'json', {'content': b'fresh'})
+        assert board_payload_cache.get(1, 'json') == (new_token, {'content': b'fresh'})
+        assert board_payload_cache.get(2, 'json')[1] is None
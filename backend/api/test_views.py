@@ -8,6 +8,14 @@ def get_user_model():
     from django.contrib.auth import get_user_model as django_get_user_model
     return django_get_user_model()
 
+def read_stream(response) -> str:
+    """Read the whole body of a response streamed from an async iterator."""
+    from asgiref.sync import async_to_sync
+
+    async def collect():
+        return [chunk async for chunk in response.streaming_content]
+    return b''.join(async_to_sync(collect)()).decode()
+
 def delete_user(user) -> None:
     """Deleted users after succesful testing"""
     try:
@@ -310,7 +318,7 @@ class TestUserViewSet:
 class TestRetrospectiveViewSet:
     """Test cases for the RetrospectiveViewSet."""
 
-    def test_generate_action_items_success(self, api_client):
+    def test_generate_action_items_success(self, api_client, settings):
         """Test successful generation of action items using AI."""
         from api.models import Retrospective, RetrospectiveItem, Team
         User = get_user_model()
@@ -350,20 +358,28 @@ class TestRetrospectiveViewSet:
             author=user
         )
         
+        # Run the generation job inside the request so its result can be checked
+        settings.GENAI_JOBS_RUN_INLINE = True
+
         try:
             # Test the generate_action_items endpoint
             url = reverse('retrospective-generate-action-items', kwargs={'pk': retrospective.pk})
             response = api_client.post(url)
             
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            assert 'job_id' in response.data
+
+            job_response = api_client.get(reverse('genaijob-detail', kwargs={'pk': response.data['job_id']}))
+
             # Note: This test will fail if Ollama is not running or accessible
             # In a real test environment, you might want to mock the AI service
-            if response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR:
+            if job_response.data['status'] == 'failed':
                 pytest.skip("Ollama service not available for testing")
             
-            assert response.status_code == status.HTTP_201_CREATED
-            assert 'action_items' in response.data
-            assert 'message' in response.data
-            assert len(response.data['action_items']) > 0
+            assert job_response.data['status'] == 'succeeded'
+            assert 'action_items' in job_response.data['result']
+            assert 'message' in job_response.data['result']
+            assert len(job_response.data['result']['action_items']) > 0
             
             # Verify action items were created in database
             action_items = retrospective.action_items.all()
@@ -416,3 +432,906 @@ class TestRetrospectiveViewSet:
         response = api_client.post(url)
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cluster_saves_cluster_ids(self, api_client, fake_transformer, retrospective):
+        """Test that clustering a retrospective persists labels and returns counts."""
+        from api.models import RetrospectiveItem
+        RetrospectiveItem.objects.create(
+            retrospective=retrospective,
+            category='start',
+            content='Start pairing on reviews',
+            author=retrospective.created_by
+        )
+        url = reverse('retrospective-cluster', kwargs={'pk': retrospective.pk})
+
+        response = api_client.post(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        # The duplicate card shares a cluster with the original
+        assert response.data['clusters'] == {'start': {0: 2, 1: 1}, 'stop': {0: 1}}
+        start_items = retrospective.items.filter(category='start').order_by('id')
+        assert [item.cluster_id for item in start_items] == [0, 1, 0]
+
+    def test_cluster_with_unknown_engine(self, api_client, fake_transformer, retrospective):
+        """Test that an unknown clustering engine is rejected."""
+        url = reverse('retrospective-cluster', kwargs={'pk': retrospective.pk})
+
+        response = api_client.post(url, {'engine': 'kmeans'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'kmeans' in response.data['error']
+
+    def test_generate_action_items_returns_job(self, api_client, retrospective, settings, monkeypatch):
+        """Test that generation runs as a job whose result can be polled."""
+        from api.models import RetrospectiveItem
+        from api.services.generate_actionitems import GenAIService
+        settings.GENAI_JOBS_RUN_INLINE = True
+
+        def fake_generation(service, retrospective_id, force=False, before_save=None):
+            return [RetrospectiveItem.objects.create(
+                retrospective_id=retrospective_id,
+                category='actions',
+                content='Agree on a meeting agenda template',
+                author=retrospective.created_by
+            )]
+
+        monkeypatch.setattr(GenAIService, 'create_retrospective_items_from_ai', fake_generation)
+        url = reverse('retrospective-generate-action-items', kwargs={'pk': retrospective.pk})
+
+        response = api_client.post(url)
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_response = api_client.get(response.data['status_url'])
+        assert job_response.status_code == status.HTTP_200_OK
+        assert job_response.data['status'] == 'succeeded'
+        assert job_response.data['result']['action_items'][0]['content'] == 'Agree on a meeting agenda template'
+
+    def test_generate_action_items_reuses_unfinished_job(self, api_client, retrospective):
+        """Test that a second click while a job is pending returns the same job."""
+        from api.models import GenAIJob
+        job = GenAIJob.objects.create(retrospective=retrospective, status='running')
+        url = reverse('retrospective-generate-action-items', kwargs={'pk': retrospective.pk})
+
+        response = api_client.post(url)
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['job_id'] == job.id
+        assert GenAIJob.objects.count() == 1
+
+    def test_generate_action_items_stream(self, api_client, retrospective, settings, monkeypatch):
+        """Test that a streamed job's items are saved and pushed as Server-Sent Events."""
+        import json
+        from api.services import generate_actionitems
+        settings.GENAI_JOBS_RUN_INLINE = True
+        get_user_model().objects.create_user(
+            username='gen_ai_serviceuser', email='genai@retrospectives.local', password=None
+        )
+        completion = '{"retro_items": [{"content": "Timebox meetings", "category": "actions"}]}'
+
+        class FakeClient:
+            def chat(self, **kwargs):
+                assert kwargs['stream'] is True
+                return iter([{'message': {'content': completion[i:i + 7]}} for i in range(0, len(completion), 7)])
+
+        monkeypatch.setattr(generate_actionitems, 'get_ollama_client', lambda host, timeout: FakeClient())
+        url = reverse('retrospective-generate-action-items', kwargs={'pk': retrospective.pk})
+        job_response = api_client.post(url, {'stream': True}, format='json')
+
+        def stream(**headers):
+            response = api_client.get(job_response.data['stream_url'], HTTP_ACCEPT='text/event-stream', **headers)
+            assert response.status_code == status.HTTP_200_OK
+            assert response['Content-Type'] == 'text/event-stream'
+            return [
+                block.split('\n') for block in read_stream(response).split('\n\n')
+                if block.startswith('event:')
+            ]
+
+        events = stream()
+        assert [lines[0] for lines in events] == ['event: item', 'event: done']
+        assert events[0][1] == 'id: 1'
+        item = json.loads(events[0][2][len('data: '):])
+        assert item['content'] == 'Timebox meetings'
+        assert retrospective.items.filter(category='actions', content='Timebox meetings').count() == 1
+
+        # Reconnecting resumes after the last item seen and generates nothing again
+        assert [lines[0] for lines in stream(HTTP_LAST_EVENT_ID='1')] == ['event: done']
+        assert retrospective.items.filter(category='actions', content='Timebox meetings').count() == 1
+
+    def test_stream_failed_job(self, api_client, retrospective):
+        """Test that following a failed job ends with an error event."""
+        from api.models import GenAIJob
+        job = GenAIJob.objects.create(retrospective=retrospective, status='failed', error='Ollama is down')
+
+        response = api_client.get(reverse('genaijob-stream', kwargs={'pk': job.pk}), HTTP_ACCEPT='text/event-stream')
+
+        content = read_stream(response)
+        assert content.split('\n\n')[1].startswith('event: error')
+        assert 'Ollama is down' in content
+
+    def test_stream_sends_items_before_the_job_finishes(self, api_client, retrospective, monkeypatch):
+        """Test that saved items are streamed while the job is still running."""
+        from asgiref.sync import async_to_sync, sync_to_async
+        from django.utils import timezone
+        from api import views
+        from api.models import GenAIJob
+        monkeypatch.setattr(views, 'JOB_STREAM_POLL_INTERVAL', 0.01)
+        job = GenAIJob.objects.create(
+            retrospective=retrospective, status='running', started_at=timezone.now(),
+            result={'message': 'Generating action items', 'action_items': [{'id': 1, 'content': 'Timebox meetings'}]},
+        )
+
+        response = api_client.get(reverse('genaijob-stream', kwargs={'pk': job.pk}), HTTP_ACCEPT='text/event-stream')
+
+        def finish_job():
+            status_now = GenAIJob.objects.get(pk=job.pk).status
+            GenAIJob.objects.filter(pk=job.pk).update(status='succeeded', result={
+                'message': 'Generated 1 action item', 'action_items': [{'id': 1, 'content': 'Timebox meetings'}],
+            })
+            return status_now
+
+        async def follow():
+            chunks = response.streaming_content
+            events = []
+            async for chunk in chunks:
+                if chunk.startswith(b'event: item'):
+                    # The item arrives while the job is still running
+                    events.append(('item', await sync_to_async(finish_job)()))
+                elif chunk.startswith(b'event:'):
+                    events.append((chunk.decode().split('\n')[0], None))
+            return events
+
+        assert async_to_sync(follow)() == [('item', 'running'), ('event: done', None)]
+
+    def make_board(self, test_user, cards=500):
+        """Create a retrospective of a team with members, many cards and assigned action items."""
+        from api.models import ActionItem, Retrospective, RetrospectiveItem, Team
+        User = get_user_model()
+        team = Team.objects.create(name='Board Team')
+        members = [
+            User.objects.create_user(username=f'member{index}', email=f'member{index}@example.com', password='pass')
+            for index in range(3)
+        ]
+        team.members.add(test_user, *members)
+        retrospective = Retrospective.objects.create(title='Big Board', team=team, created_by=test_user)
+        RetrospectiveItem.objects.bulk_create([
+            RetrospectiveItem(
+                retrospective=retrospective, category='good', content=f'Card {index}',
+                author=members[index % len(members)],
+            )
+            for index in range(cards)
+        ])
+        ActionItem.objects.bulk_create([
+            ActionItem(retrospective=retrospective, title=f'Action {index}', assigned_to=member)
+            for index, member in enumerate(members)
+        ])
+        return retrospective
+
+    def test_retrieve_query_count_is_constant(self, authenticated_client, test_user, django_assert_num_queries):
+        """Test that a 500 card board is loaded without a query per card, member or action item."""
+        retrospective = self.make_board(test_user)
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+
+        # retrospective + team + creator, team members, items + authors, action items + assignees
+        with django_assert_num_queries(4):
+            response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['items']) == 500
+        assert response.data['items'][0]['author']['username'] == 'member0'
+        assert len(response.data['team']['members']) == 4
+        assert response.data['action_items'][2]['assigned_to']['username'] == 'member2'
+
+    @pytest.mark.parametrize('cards', [5, 50])
+    def test_update_query_count_is_constant(self, authenticated_client, test_user, django_assert_num_queries, cards):
+        """Test that PATCHing a board renders it without a query per card, member or action item."""
+        retrospective = self.make_board(test_user, cards=cards)
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+
+        # retrospective + team + creator, update, then team members, items + authors, action items + assignees
+        with django_assert_num_queries(5) as captured:
+            response = authenticated_client.patch(url, {'title': 'Renamed Board'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK, [query['sql'] for query in captured.captured_queries]
+        assert response.data['title'] == 'Renamed Board'
+        assert len(response.data['items']) == cards
+        assert len(response.data['team']['members']) == 4
+        assert response.data['action_items'][2]['assigned_to']['username'] == 'member2'
+
+    def test_unchanged_board_is_not_modified(self, authenticated_client, test_user, django_assert_num_queries):
+        """Test that If-None-Match with the current ETag gets a 304 from a single query."""
+        retrospective = self.make_board(test_user)
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        response = authenticated_client.get(url)
+        etag = response['ETag']
+        assert etag.startswith('"') and response['Last-Modified']
+
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not response.content
+
+        retrospective.items.first().delete()
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert len(response.data['items']) == 499
+
+    def test_etag_depends_on_the_request_and_the_retrospective(self, retrospective, authenticated_client):
+        """Test that field selections and edits of the retrospective itself change the ETag."""
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        etag = authenticated_client.get(url)['ETag']
+
+        assert authenticated_client.get(url, {'fields': 'id,title'})['ETag'] != etag
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        authenticated_client.post(reverse('retrospective-complete', kwargs={'pk': retrospective.id}))
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['status'] == 'completed'
+
+    def test_etag_changes_with_the_team_and_users_shown(self, retrospective, authenticated_client, test_user):
+        """Test that edits of the team, its members and the card authors change the ETag."""
+        from django.contrib.auth.models import update_last_login
+        from api.models import Team
+        team = Team.objects.create(name='Platform')
+        retrospective.team = team
+        retrospective.save()
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+
+        def refetch(etag):
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_200_OK
+            return response
+
+        etag = authenticated_client.get(url)['ETag']
+        authenticated_client.patch(reverse('team-detail', kwargs={'pk': team.id}), {'name': 'Infra'}, format='json')
+        response = refetch(etag)
+        assert response.data['team']['name'] == 'Infra'
+
+        team.members.add(test_user)
+        response = refetch(response['ETag'])
+        assert [member['id'] for member in response.data['team']['members']] == [test_user.id]
+
+        authenticated_client.patch(
+            reverse('user-detail', kwargs={'pk': test_user.id}), {'userfullname': 'Renamed User'}, format='json'
+        )
+        response = refetch(response['ETag'])
+        assert response.data['items'][0]['author']['userfullname'] == 'Renamed User'
+
+        # Logging in doesn't change what the board shows
+        update_last_login(None, test_user)
+        assert authenticated_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_if_modified_since(self, retrospective, authenticated_client):
+        """Test that Last-Modified is honored when the client sends no ETag."""
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        last_modified = authenticated_client.get(url)['Last-Modified']
+
+        response = authenticated_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert authenticated_client.get(
+            reverse('retrospective-detail', kwargs={'pk': 999999}), HTTP_IF_NONE_MATCH='*'
+        ).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_completed_board_is_served_from_the_cache(
+        self, authenticated_client, test_user, django_assert_num_queries
+    ):
+        """Test that a completed board is rendered once and then served without any query."""
+        retrospective = self.make_board(test_user, cards=20)
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        authenticated_client.post(reverse('retrospective-complete', kwargs={'pk': retrospective.id}))
+        first = authenticated_client.get(url)
+
+        with django_assert_num_queries(0):
+            cached = authenticated_client.get(url)
+            not_modified = authenticated_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        assert cached.status_code == status.HTTP_200_OK
+        assert cached['Content-Type'] == 'application/json'
+        assert cached.content == first.content
+        assert cached['ETag'] == first['ETag']
+        assert len(cached.json()['items']) == 20
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+        # Other field selections are cached separately
+        assert authenticated_client.get(url, {'fields': 'id,status'}).json() == {
+            'id': retrospective.id, 'status': 'completed'
+        }
+
+    def test_writes_invalidate_cached_boards(self, authenticated_client, test_user, django_assert_num_queries):
+        """Test that item writes, bulk writes and edits of the retrospective drop its cached payload."""
+        retrospective = self.make_board(test_user, cards=3)
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        authenticated_client.post(reverse('retrospective-archive', kwargs={'pk': retrospective.id}))
+        item = retrospective.items.order_by('id').first()
+        authenticated_client.get(url)
+
+        authenticated_client.patch(
+            reverse('retrospectiveitem-position', kwargs={'pk': item.id}), {'x_minimized': 77}, format='json'
+        )
+        items = {card['id']: card for card in authenticated_client.get(url).json()['items']}
+        assert items[item.id]['x_minimized'] == 77
+
+        authenticated_client.patch(
+            reverse('retrospectiveitem-detail', kwargs={'pk': item.id}), {'content': 'Edited'}, format='json'
+        )
+        items = {card['id']: card for card in authenticated_client.get(url).json()['items']}
+        assert items[item.id]['content'] == 'Edited'
+
+        authenticated_client.patch(url, {'title': 'Renamed'}, format='json')
+        assert authenticated_client.get(url).json()['title'] == 'Renamed'
+
+        authenticated_client.delete(url)
+        assert authenticated_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_team_and_user_edits_invalidate_cached_boards(self, retrospective, authenticated_client, test_user):
+        """Test that the team and users rendered into a cached board drop it when edited."""
+        from api.models import Team
+        retrospective.team = Team.objects.create(name='Platform')
+        retrospective.status = 'archived'
+        retrospective.save()
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        authenticated_client.get(url)
+
+        retrospective.team.name = 'Infra'
+        retrospective.team.save()
+        assert authenticated_client.get(url).json()['team']['name'] == 'Infra'
+
+        test_user.userfullname = 'Renamed User'
+        test_user.save()
+        assert authenticated_client.get(url).json()['created_by']['userfullname'] == 'Renamed User'
+
+    def test_active_and_browsable_boards_are_not_cached(self, retrospective, authenticated_client):
+        """Test that only JSON renderings of boards that are no longer active are cached."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+
+        def queries(**headers):
+            with CaptureQueriesContext(connection) as context:
+                assert authenticated_client.get(url, **headers).status_code == status.HTTP_200_OK
+            return len(context.captured_queries)
+
+        authenticated_client.get(url)
+        assert queries() > 0
+
+        authenticated_client.post(reverse('retrospective-complete', kwargs={'pk': retrospective.id}))
+        authenticated_client.get(url, HTTP_ACCEPT='text/html')
+        assert queries(HTTP_ACCEPT='text/html') > 0
+        assert queries() > 0
+        assert queries() == 0
+
+    def test_file_based_board_cache(self, retrospective, authenticated_client, settings, tmp_path):
+        """Test that the board cache can be kept in files shared by all processes."""
+        settings.CACHES = {
+            **settings.CACHES,
+            'boards': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)},
+        }
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        authenticated_client.post(reverse('retrospective-complete', kwargs={'pk': retrospective.id}))
+
+        first = authenticated_client.get(url)
+
+        assert len(list(tmp_path.iterdir())) == 2  # generation token and payload
+        assert authenticated_client.get(url).content == first.content
+
+    def test_list_returns_summaries(self, authenticated_client, test_user, django_assert_num_queries):
+        """Test that the list has counts instead of cards, in one query besides the page count."""
+        from api.models import Retrospective
+        self.make_board(test_user, cards=50)
+        Retrospective.objects.create(title='Empty Board', created_by=test_user)
+
+        with django_assert_num_queries(2) as captured:
+            response = authenticated_client.get(reverse('retrospective-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        # Counted in subqueries, not by joining items and action items to every retrospective
+        assert 'JOIN "api_retrospectiveitem"' not in captured.captured_queries[-1]['sql']
+        assert [summary['title'] for summary in response.data['results']] == ['Empty Board', 'Big Board']
+        summaries = {summary['title']: summary for summary in response.data['results']}
+        assert 'items' not in summaries['Big Board']
+        assert summaries['Big Board']['item_count'] == 50
+        assert summaries['Big Board']['action_item_count'] == 3
+        assert summaries['Big Board']['team']['name'] == 'Board Team'
+        assert summaries['Big Board']['created_by']['username'] == test_user.username
+        assert summaries['Empty Board']['item_count'] == 0
+        assert summaries['Empty Board']['team'] is None
+
+    def test_expanded_list_query_count_is_constant(self, authenticated_client, test_user, django_assert_num_queries):
+        """Test that ?expand=true lists full boards without a query per retrospective."""
+        from api.models import Retrospective
+        self.make_board(test_user, cards=50)
+        Retrospective.objects.create(title='Empty Board', created_by=test_user)
+
+        # page count, then the same four queries as retrieve
+        with django_assert_num_queries(5):
+            response = authenticated_client.get(reverse('retrospective-list') + '?expand=true')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 2
+        assert all('items' in retrospective for retrospective in response.data['results'])
+
+
+    def test_sparse_fieldset(self, authenticated_client, test_user, django_assert_num_queries):
+        """Test that ?fields= trims the response and skips the joins of dropped fields."""
+        retrospective = self.make_board(test_user, cards=20)
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id}) + '?fields=id,title,status'
+
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'id': retrospective.id, 'title': 'Big Board', 'status': 'active'}
+
+    def test_expand_renders_other_relations_as_keys(self, authenticated_client, test_user, django_assert_num_queries):
+        """Test that ?expand= keeps only the named relations nested."""
+        retrospective = self.make_board(test_user, cards=20)
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id}) + '?expand=items&omit=description'
+
+        # retrospective, items + authors, action item keys
+        with django_assert_num_queries(3):
+            response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'description' not in response.data
+        assert response.data['team'] == retrospective.team_id
+        assert response.data['created_by'] == test_user.id
+        assert response.data['items'][0]['author']['username'] == 'member0'
+        assert sorted(response.data['action_items']) == sorted(retrospective.action_items.values_list('id', flat=True))
+
+    def test_unknown_selected_field(self, authenticated_client, retrospective):
+        """Test that selecting a field the serializer doesn't have returns 400."""
+        url = reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+
+        assert authenticated_client.get(url + '?fields=title,secret').status_code == status.HTTP_400_BAD_REQUEST
+        assert authenticated_client.get(url + '?expand=title').status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestRetrospectiveItemViewSet:
+    """Test cases for the RetrospectiveItemViewSet."""
+
+    def test_create_with_cluster_param(self, fake_transformer, retrospective, authenticated_client):
+        """Test that ?cluster=true assigns a cluster when a card is created."""
+        url = reverse('retrospectiveitem-list') + '?cluster=true'
+        response = authenticated_client.post(url, {
+            'retrospective': retrospective.id,
+            'category': 'stop',
+            'content': 'Stop merging on Fridays',
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['cluster_id'] == 1
+
+    def test_create_with_similar_param(self, fake_transformer, retrospective, authenticated_client):
+        """Test that ?similar=k returns the most similar existing cards."""
+        url = reverse('retrospectiveitem-list') + '?similar=2'
+        response = authenticated_client.post(url, {
+            'retrospective': retrospective.id,
+            'category': 'start',
+            'content': 'Start writing more tests',
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        similar_items = response.data['similar_items']
+        assert len(similar_items) == 2
+        assert similar_items[0]['content'] == 'Start writing more tests'
+        assert similar_items[0]['similarity'] == pytest.approx(1.0)
+        assert similar_items[0]['similarity'] > similar_items[1]['similarity']
+
+    def test_create_with_invalid_similar_param(self, fake_transformer, retrospective, authenticated_client):
+        """Test that a non-numeric ?similar value is rejected before creating the card."""
+        url = reverse('retrospectiveitem-list') + '?similar=many'
+        response = authenticated_client.post(url, {
+            'retrospective': retrospective.id,
+            'category': 'start',
+            'content': 'Start writing more tests',
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert retrospective.items.count() == 3
+
+    def test_list_with_collapsed_author(self, retrospective, authenticated_client, test_user):
+        """Test that ?expand= with no names renders the author as a primary key."""
+        url = reverse('retrospectiveitem-list') + '?expand=&fields=id,author'
+        response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert {tuple(item) for item in response.data['results']} == {('id', 'author')}
+        assert {item['author'] for item in response.data['results']} == {test_user.id}
+
+    def test_cursor_pagination(self, retrospective, authenticated_client, test_user, django_assert_num_queries):
+        """Test that items are paged by cursor in (created_at, id) order, also when timestamps tie."""
+        from django.utils import timezone
+        from api.models import RetrospectiveItem
+        created_at = timezone.now()
+        RetrospectiveItem.objects.bulk_create([
+            RetrospectiveItem(
+                retrospective=retrospective, author=test_user, category='good',
+                content=f'Card {index}', created_at=created_at,
+            )
+            for index in range(45)
+        ])
+
+        ids = []
+        url = reverse('retrospectiveitem-list')
+        while url:
+            # no COUNT(*), one query per page
+            with django_assert_num_queries(1):
+                response = authenticated_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert 'count' not in response.data
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        expected = RetrospectiveItem.objects.order_by('created_at', 'id').values_list('id', flat=True)
+        assert ids == list(expected)
+        assert len(ids) == 48
+
+    def test_list_filters(self, retrospective, authenticated_client, test_user):
+        """Test filtering items by retrospective, category, author, cluster and creation time."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from api.models import Retrospective, RetrospectiveItem
+        other = Retrospective.objects.create(title='Other', created_by=test_user)
+        RetrospectiveItem.objects.create(retrospective=other, author=test_user, category='start', content='Elsewhere')
+        retrospective.items.filter(content='Start writing more tests').update(
+            cluster_id=3, created_at=timezone.now() + timedelta(hours=1)
+        )
+        url = reverse('retrospectiveitem-list')
+
+        def contents(query):
+            response = authenticated_client.get(url + query)
+            assert response.status_code == status.HTTP_200_OK
+            return sorted(item['content'] for item in response.data['results'])
+
+        assert contents(f'?retrospective={retrospective.id}&category=start') == [
+            'Start pairing on reviews', 'Start writing more tests'
+        ]
+        assert contents(f'?retrospective={other.id}&author={test_user.id}') == ['Elsewhere']
+        assert contents('?cluster_id=3') == ['Start writing more tests']
+        after = (timezone.now() + timedelta(minutes=30)).isoformat()
+        assert contents(f'?created_after={after.replace("+", "%2B")}') == ['Start writing more tests']
+
+    @pytest.mark.parametrize('query', ['?retrospective=abc', '?cluster_id=1.5', '?created_after=yesterday'])
+    def test_invalid_filters(self, authenticated_client, query):
+        """Test that malformed filter values return 400."""
+        response = authenticated_client.get(reverse('retrospectiveitem-list') + query)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_filters_use_composite_indexes(self, retrospective):
+        """Test that board column and filtered list queries are planned on the composite indexes."""
+        from api.models import RetrospectiveItem
+        from api.services.cluster_retroitems import ClusteringService
+
+        column_plan = ClusteringService().get_item_queryset(retrospective.id, 'start').explain()
+        list_plan = RetrospectiveItem.objects.filter(retrospective_id=retrospective.id).order_by('created_at', 'id').explain()
+
+        assert 'retroitem_retro_category_idx' in column_plan
+        assert 'retroitem_retro_created_idx' in list_plan
+
+    def test_bulk_create_update_and_delete(self, retrospective, authenticated_client, test_user, django_assert_max_num_queries):
+        """Test that a re-layout of 200 cards plus creates and deletes is one request and a few statements."""
+        from api.models import RetrospectiveItem
+        RetrospectiveItem.objects.bulk_create([
+            RetrospectiveItem(retrospective=retrospective, author=test_user, category='start', content=f'Card {index}')
+            for index in range(200)
+        ])
+        cards = list(RetrospectiveItem.objects.filter(content__startswith='Card ').order_by('id'))
+        doomed = list(retrospective.items.exclude(content__startswith='Card ').values_list('id', flat=True))
+        payload = {
+            'create': [
+                {'retrospective': retrospective.id, 'category': 'stop', 'content': f'New {index}', 'x_minimized': 10}
+                for index in range(5)
+            ],
+            'update': [{'id': card.id, 'x_minimized': index, 'y_minimized': 2 * index} for index, card in enumerate(cards)],
+            'delete': doomed,
+        }
+
+        # one lookup of the created cards' retrospectives, then savepoint, SELECT updated cards, revision
+        # bump and read + INSERT, revision bump and read + UPDATE (two on SQLite, whose parameter limit splits the
+        # batch), SELECT deleted cards + revision bump and read + tombstone INSERT, SELECT + DELETE deleted
+        # cards, release: independent of the number of moved cards
+        with django_assert_max_num_queries(17):
+            response = authenticated_client.post(reverse('retrospectiveitem-bulk'), payload, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['deleted'] == 3
+        assert [item['content'] for item in response.data['created']] == [f'New {index}' for index in range(5)]
+        assert all(item['author']['id'] == test_user.id for item in response.data['created'])
+        assert len(response.data['updated']) == 200
+        moved = RetrospectiveItem.objects.get(id=cards[150].id)
+        assert (moved.x_minimized, moved.y_minimized, moved.category) == (150, 300, 'start')
+        assert retrospective.items.count() == 205
+
+    @pytest.mark.parametrize('cards', [1, 50])
+    def test_bulk_create_looks_up_retrospectives_once(
+        self, retrospective, authenticated_client, django_assert_num_queries, cards
+    ):
+        """Test that creating cards validates their retrospective in one query, however many there are."""
+        payload = {'create': [
+            {'retrospective': retrospective.id, 'category': 'stop', 'content': f'New {index}'} for index in range(cards)
+        ]}
+
+        # retrospectives, savepoint, revision bump and read-back, INSERT, release
+        with django_assert_num_queries(6):
+            response = authenticated_client.post(reverse('retrospectiveitem-bulk'), payload, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['created']) == cards
+        assert retrospective.items.filter(content__startswith='New ').count() == cards
+
+    def test_bulk_create_rejects_unknown_retrospectives(self, retrospective, authenticated_client):
+        """Test that a created card of a retrospective that doesn't exist fails validation."""
+        payload = {'create': [
+            {'retrospective': retrospective.id, 'category': 'stop', 'content': 'Fine'},
+            {'retrospective': 999999, 'category': 'stop', 'content': 'Lost'},
+            {'retrospective': 'abc', 'category': 'stop', 'content': 'Garbled'},
+        ]}
+
+        response = authenticated_client.post(reverse('retrospectiveitem-bulk'), payload, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        errors = response.data['create']
+        assert errors[0] == {}
+        assert errors[1]['retrospective'][0].code == 'does_not_exist'
+        assert errors[2]['retrospective'][0].code == 'incorrect_type'
+        assert retrospective.items.count() == 3
+
+    def test_bulk_is_all_or_nothing(self, retrospective, authenticated_client):
+        """Test that one invalid operation rejects the whole request."""
+        item = retrospective.items.first()
+        payload = {
+            'create': [{'retrospective': retrospective.id, 'category': 'stop', 'content': 'Fine'}],
+            'update': [{'id': item.id, 'x_minimized': 50}, {'id': 999999, 'x_minimized': 1}],
+        }
+
+        response = authenticated_client.post(reverse('retrospectiveitem-bulk'), payload, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert '999999' in str(response.data['update'])
+        item.refresh_from_db()
+        assert item.x_minimized == 0
+        assert retrospective.items.count() == 3
+
+    def test_bulk_validation_errors(self, retrospective, authenticated_client):
+        """Test that field errors are reported per operation list."""
+        payload = {
+            'create': [{'retrospective': retrospective.id, 'category': 'nonsense', 'content': 'x'}],
+            'update': [{'x_minimized': 1}],
+            'delete': ['abc'],
+        }
+
+        response = authenticated_client.post(reverse('retrospectiveitem-bulk'), payload, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert set(response.data) == {'create', 'update', 'delete'}
+
+    def test_position_fast_path(self, retrospective, authenticated_client, django_assert_num_queries):
+        """Test that moving a card is a revision bump and a single UPDATE answered with 204."""
+        item = retrospective.items.first()
+        url = reverse('retrospectiveitem-position', kwargs={'pk': item.id})
+
+        # revision bump and read, UPDATE
+        with django_assert_num_queries(3):
+            response = authenticated_client.patch(url, {'x_minimized': 120, 'y_minimized': 80}, format='json')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        item.refresh_from_db()
+        assert (item.x_minimized, item.y_minimized, item.x_maximized) == (120, 80, 0)
+
+    def test_position_errors(self, retrospective, authenticated_client):
+        """Test that missing cards give 404 and non-integer or empty positions give 400."""
+        item = retrospective.items.first()
+        url = reverse('retrospectiveitem-position', kwargs={'pk': item.id})
+        missing_url = reverse('retrospectiveitem-position', kwargs={'pk': 999999})
+
+        assert authenticated_client.patch(missing_url, {'x_minimized': 1}, format='json').status_code == 404
+        assert authenticated_client.patch(url, {'x_minimized': 'left'}, format='json').status_code == 400
+        assert authenticated_client.patch(url, {}, format='json').status_code == 400
+
+
+def listen_to_board(retrospective_id, change, messages=1, origin=b'http://localhost'):
+    """Open the board's WebSocket, run ``change`` and return the connection result and the events received."""
+    from asgiref.sync import async_to_sync, sync_to_async
+    from channels.testing import WebsocketCommunicator
+    from retrospectives.asgi import application
+
+    async def session():
+        communicator = WebsocketCommunicator(
+            application, f'/ws/retrospectives/{retrospective_id}/', headers=[(b'origin', origin)]
+        )
+        connected, _ = await communicator.connect()
+        if not connected:
+            return False, []
+        await sync_to_async(change)()
+        events = [await communicator.receive_json_from() for _ in range(messages)]
+        assert await communicator.receive_nothing()
+        await communicator.disconnect()
+        return True, events
+
+    return async_to_sync(session)()
+
+
+@pytest.mark.django_db
+class TestBoardSync:
+    """Test cases for the real-time board WebSocket."""
+
+    def test_connect_requires_existing_retrospective_and_allowed_origin(self, retrospective):
+        """Test that unknown boards and foreign origins are rejected."""
+        assert listen_to_board(999999, lambda: None, messages=0)[0] is False
+        assert listen_to_board(retrospective.id, lambda: None, messages=0, origin=b'http://evil.example')[0] is False
+        assert listen_to_board(retrospective.id, lambda: None, messages=0)[0] is True
+
+    def test_item_changes_are_broadcast(
+        self, retrospective, authenticated_client, django_capture_on_commit_callbacks
+    ):
+        """Test that created, edited, moved and deleted items reach open boards as deltas."""
+        item = retrospective.items.first()
+
+        def change():
+            with django_capture_on_commit_callbacks(execute=True):
+                response = authenticated_client.post(reverse('retrospectiveitem-list'), {
+                    'retrospective': retrospective.id, 'category': 'bad', 'content': 'Flaky CI',
+                }, format='json')
+                assert response.status_code == status.HTTP_201_CREATED
+                authenticated_client.patch(
+                    reverse('retrospectiveitem-detail', kwargs={'pk': item.id}), {'content': 'Edited'}, format='json'
+                )
+                authenticated_client.patch(
+                    reverse('retrospectiveitem-position', kwargs={'pk': item.id}), {'x_minimized': 42}, format='json'
+                )
+                authenticated_client.delete(reverse('retrospectiveitem-detail', kwargs={'pk': item.id}))
+
+        connected, events = listen_to_board(retrospective.id, change, messages=4)
+
+        assert connected
+        assert [event['type'] for event in events] == ['item.created', 'item.updated', 'item.moved', 'item.deleted']
+        assert events[0]['item']['content'] == 'Flaky CI'
+        assert events[1]['item'] == {**events[1]['item'], 'id': item.id, 'content': 'Edited'}
+        assert events[2] == {'type': 'item.moved', 'id': item.id, 'x_minimized': 42}
+        assert events[3] == {'type': 'item.deleted', 'id': item.id}
+
+    def test_bulk_changes_are_broadcast_once(
+        self, retrospective, authenticated_client, django_capture_on_commit_callbacks
+    ):
+        """Test that a bulk request is broadcast as one delta besides the deletes."""
+        first, second, third = retrospective.items.order_by('id')
+        payload = {
+            'create': [{'retrospective': retrospective.id, 'category': 'stop', 'content': 'Pairing'}],
+            'update': [{'id': first.id, 'x_minimized': 10}, {'id': second.id, 'cluster_id': 3}],
+            'delete': [third.id],
+        }
+
+        def change():
+            with django_capture_on_commit_callbacks(execute=True):
+                response = authenticated_client.post(reverse('retrospectiveitem-bulk'), payload, format='json')
+                assert response.status_code == status.HTTP_200_OK
+
+        connected, events = listen_to_board(retrospective.id, change, messages=2)
+
+        assert connected
+        assert events[0] == {'type': 'item.deleted', 'id': third.id}
+        assert events[1]['type'] == 'items.bulk'
+        assert [item['content'] for item in events[1]['created']] == ['Pairing']
+        assert [(item['id'], item['x_minimized'], item['cluster_id']) for item in events[1]['updated']] == [
+            (first.id, 10, first.cluster_id), (second.id, second.x_minimized, 3),
+        ]
+
+    def test_uncommitted_changes_are_not_broadcast(self, retrospective, authenticated_client):
+        """Test that nothing is sent for a change whose transaction never commits."""
+        def change():
+            authenticated_client.patch(
+                reverse('retrospectiveitem-position', kwargs={'pk': retrospective.items.first().id}),
+                {'x_minimized': 42}, format='json',
+            )
+
+        assert listen_to_board(retrospective.id, change, messages=0) == (True, [])
+
+
+@pytest.mark.django_db
+class TestRetrospectiveChanges:
+    """Test cases for syncing a board by revision."""
+
+    def test_writes_bump_the_revision(self, retrospective, authenticated_client):
+        """Test that every write to an item or action item gets a new revision of its retrospective."""
+        from api.models import ActionItem
+        retrospective.refresh_from_db()
+        start = retrospective.revision
+        item = retrospective.items.first()
+
+        authenticated_client.patch(
+            reverse('retrospectiveitem-position', kwargs={'pk': item.id}), {'x_minimized': 5}, format='json'
+        )
+        action_item = ActionItem.objects.create(retrospective=retrospective, title='Write tests')
+
+        retrospective.refresh_from_db()
+        item.refresh_from_db()
+        assert (item.revision, action_item.revision, retrospective.revision) == (start + 1, start + 2, start + 2)
+
+        # Saving the retrospective itself never writes back a stale revision
+        retrospective.revision = 0
+        retrospective.status = 'completed'
+        retrospective.save()
+        retrospective.refresh_from_db()
+        assert (retrospective.status, retrospective.revision) == ('completed', start + 2)
+
+    def test_changes_since_revision(self, retrospective, authenticated_client, django_assert_num_queries):
+        """Test that only rows written or deleted after ?since= are returned."""
+        from api.models import ActionItem
+        first, second, _ = retrospective.items.order_by('id')
+        deleted_item_id = second.id
+        since = authenticated_client.get(
+            reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        ).data['revision']
+
+        first.content = 'Edited'
+        first.save()
+        second.delete()
+        action_item = ActionItem.objects.create(retrospective=retrospective, title='Write tests')
+        deleted_action_item_id = action_item.id
+        action_item.delete()
+        url = reverse('retrospective-changes', kwargs={'pk': retrospective.id})
+
+        # retrospective, items, action items, tombstones
+        with django_assert_num_queries(4):
+            response = authenticated_client.get(url, {'since': since})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['revision'] == since + 4
+        assert [item['content'] for item in response.data['items']] == ['Edited']
+        assert response.data['action_items'] == []
+        assert response.data['deleted'] == {'items': [deleted_item_id], 'action_items': [deleted_action_item_id]}
+
+        response = authenticated_client.get(url, {'since': response.data['revision']})
+        assert (response.data['items'], response.data['deleted']) == ([], {'items': [], 'action_items': []})
+
+    def test_bulk_writes_are_tracked(self, retrospective, authenticated_client):
+        """Test that bulk creates, updates and deletes are tracked although they skip save()."""
+        first, second, third = retrospective.items.order_by('id')
+        since = authenticated_client.get(
+            reverse('retrospective-detail', kwargs={'pk': retrospective.id})
+        ).data['revision']
+        payload = {
+            'create': [{'retrospective': retrospective.id, 'category': 'stop', 'content': 'Pairing'}],
+            'update': [{'id': first.id, 'x_minimized': 10}],
+            'delete': [second.id, third.id],
+        }
+        authenticated_client.post(reverse('retrospectiveitem-bulk'), payload, format='json')
+
+        response = authenticated_client.get(
+            reverse('retrospective-changes', kwargs={'pk': retrospective.id}), {'since': since}
+        )
+
+        assert sorted(item['content'] for item in response.data['items']) == ['Pairing', first.content]
+        assert sorted(response.data['deleted']['items']) == [second.id, third.id]
+
+    def test_deleting_the_author_leaves_tombstones(self, retrospective, authenticated_client):
+        """Test that items deleted through a cascade are reported, unlike those of deleted retrospectives."""
+        from django.contrib.auth import get_user_model
+        from api.models import DeletedRow, RetrospectiveItem
+        author = get_user_model().objects.create_user(username='leaver', email='leaver@example.com', password='x')
+        item = RetrospectiveItem.objects.create(
+            retrospective=retrospective, category='bad', content='Bye', author=author
+        )
+
+        author.delete()
+        assert list(DeletedRow.objects.values_list('kind', 'object_id')) == [('item', item.id)]
+
+        retrospective.delete()
+        assert not DeletedRow.objects.exists()
+
+    def test_since_is_validated(self, retrospective, authenticated_client):
+        """Test that a missing, non-integer or negative ?since= gives 400."""
+        url = reverse('retrospective-changes', kwargs={'pk': retrospective.id})
+
+        for params in ({}, {'since': 'yesterday'}, {'since': -1}):
+            response = authenticated_client.get(url, params)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert 'since' in response.data
@@ -8,6 +8,7 @@ router.register(r'teams', views.TeamViewSet)
 router.register(r'retrospectives', views.RetrospectiveViewSet)
 router.register(r'retrospective-items', views.RetrospectiveItemViewSet)
 router.register(r'action-items', views.ActionItemViewSet)
+router.register(r'genai-jobs', views.GenAIJobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,19 +1,135 @@
-from rest_framework import viewsets, permissions, status
+import asyncio
+import hashlib
+import logging
+from datetime import timedelta
+from typing import List, Optional, Tuple
+from asgiref.sync import sync_to_async
+from rest_framework import serializers, viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Team, Retrospective, RetrospectiveItem, ActionItem
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from .models import Team, Retrospective, RetrospectiveItem, ActionItem, GenAIJob
 from .serializers import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer, TeamSerializer, TeamCreateSerializer,
-    RetrospectiveSerializer, RetrospectiveCreateSerializer, RetrospectiveItemSerializer,
-    ActionItemSerializer
+    RetrospectiveSerializer, RetrospectiveSummarySerializer, RetrospectiveCreateSerializer, RetrospectiveItemSerializer,
+    RetrospectiveItemBulkUpdateSerializer, ItemPositionSerializer,
+    ActionItemSerializer, GenAIJobSerializer
 )
-from .services.generate_actionitems import GenAIService
+from .pagination import CreatedAtCursorPagination
+from .renderers import EventStreamRenderer, format_sse_event
+from .schemas import DEFAULT_CLUSTERING_ENGINE
+from .services.board_cache import board_payload_cache
+from .services.board_events import broadcast_items_bulk
+from .services.cluster_retroitems import ClusteringService, centroid_cache
+from .services.genai_jobs import GenAIQueueFull, enqueue_genai_job
+from .services.item_positions import position_coalescer
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+TRUTHY_QUERY_VALUES = ('1', 'true', 'yes')
+# Actions that render the full, nested serializer
+SERIALIZING_ACTIONS = ('list', 'retrieve', 'update', 'partial_update')
+# Actions that honour ?fields=, ?omit= and ?expand=
+FIELD_SELECTION_ACTIONS = ('list', 'retrieve')
+MAX_SIMILAR_ITEMS = 20
+# Integer query parameters of the item list and the field each one filters
+ITEM_INTEGER_FILTERS = {'retrospective': 'retrospective_id', 'author': 'author_id', 'cluster_id': 'cluster_id'}
+# Creates, updates and deletes accepted by one bulk request
+MAX_BULK_OPERATIONS = 1000
+# Seconds between reads of a job followed over Server-Sent Events
+JOB_STREAM_POLL_INTERVAL = 0.5
+
+
+class FieldSelectionMixin:
+    """?fields=, ?omit= and ?expand= on list and retrieve.
+
+    Each takes comma separated top-level field names. ?expand= keeps only the
+    named nested objects nested and renders the others as primary keys;
+    ?expand=true expands everything. The rendered fields also decide which
+    joins, prefetches and annotations the queryset gets.
+    """
+
+    # Views may clear this to prefetch self.prefetch_lookups themselves, after fetching
+    prefetch_on_fetch = True
+
+    def get_field_selection(self, param: str) -> Optional[List[str]]:
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def get_expand(self) -> Optional[List[str]]:
+        expand = self.get_field_selection('expand')
+        if expand and len(expand) == 1 and expand[0].lower() in TRUTHY_QUERY_VALUES:
+            return None
+        return expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.action in FIELD_SELECTION_ACTIONS:
+            context.update(
+                fields=self.get_field_selection('fields'),
+                omit=self.get_field_selection('omit'),
+                expand=self.get_expand(),
+            )
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        self.prefetch_lookups = []
+        if self.action not in SERIALIZING_ACTIONS:
+            return queryset
+
+        serializer = self.get_serializer()
+        annotations = getattr(serializer, 'annotations', {})
+        related_lookups = getattr(serializer, 'related_lookups', {})
+        for name, field in serializer.fields.items():
+            if name in annotations:
+                queryset = queryset.annotate(**{name: annotations[name]})
+            elif isinstance(field, serializers.BaseSerializer):
+                select_related, prefetch_related = related_lookups.get(name, ((), ()))
+                # select_related() without arguments would follow every non-null foreign key
+                if select_related:
+                    queryset = queryset.select_related(*select_related)
+                self.prefetch_lookups.extend(prefetch_related)
+            elif isinstance(field, serializers.ManyRelatedField):
+                # Collapsed to primary keys: only the keys are prefetched
+                self.prefetch_lookups.append(field.source)
+        if self.prefetch_on_fetch:
+            queryset = queryset.prefetch_related(*self.prefetch_lookups)
+        return queryset
+
+    def update(self, request, *args, **kwargs):
+        """DRF's update, prefetching the rendered relations after the save.
+
+        UpdateModelMixin drops the instance's prefetched objects once it is
+        saved, so prefetching on fetch would be wasted and the response would
+        query related rows one by one.
+        """
+        partial = kwargs.pop('partial', False)
+        self.prefetch_on_fetch = False
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        prefetch_related_objects([serializer.instance], *self.prefetch_lookups)
+        return Response(serializer.data)
+
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
@@ -49,7 +165,7 @@ class UserViewSet(viewsets.ModelViewSet):
             raise
 
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
     permission_classes = [permissions.AllowAny]
@@ -90,15 +206,92 @@ class TeamViewSet(viewsets.ModelViewSet):
             )
 
 
-class RetrospectiveViewSet(viewsets.ModelViewSet):
-    queryset = Retrospective.objects.all()
+class RetrospectiveViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
+    queryset = Retrospective.objects.all().order_by('-created_at', '-id')
     serializer_class = RetrospectiveSerializer
     permission_classes = [permissions.AllowAny]
     
     def get_serializer_class(self):
         if self.action == 'create':
             return RetrospectiveCreateSerializer
+        if self.action == 'list' and not self.expand_list():
+            return RetrospectiveSummarySerializer
         return RetrospectiveSerializer
+
+    def expand_list(self) -> bool:
+        """?expand lists retrospectives with (some of) their cards and action items."""
+        return 'expand' in self.request.query_params
+
+    def retrieve(self, request, *args, **kwargs):
+        """The full retrospective, or 304 Not Modified while the client's copy is current.
+
+        ETag and Last-Modified come from the retrospective's revision and
+        updated_at, which also move when its team, the team's members or the
+        authors and assignees shown on the board are edited. The cards, action items and team members are only
+        prefetched once the client's copy turns out to be stale, so a 304
+        costs a single query. Completed and archived retrospectives are
+        rendered once and then served from the board cache without any query.
+        """
+        retrospective_id = self.get_cacheable_id()
+        variant = self.get_payload_variant()
+        if retrospective_id is not None:
+            generation, payload = board_payload_cache.get(retrospective_id, variant)
+            if payload is not None:
+                return self.payload_response(payload)
+
+        self.prefetch_on_fetch = False
+        instance = self.get_object()
+        etag, last_modified = self.get_board_version(instance, variant)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            prefetch_related_objects([instance], *self.prefetch_lookups)
+            data = self.get_serializer(instance).data
+            if retrospective_id is None or instance.status == 'active':
+                response = Response(data)
+            else:
+                renderer = request.accepted_renderer
+                payload = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'content_type': renderer.media_type,
+                    'content': renderer.render(data, request.accepted_media_type, self.get_renderer_context()),
+                }
+                board_payload_cache.set(retrospective_id, generation, variant, payload)
+                return self.payload_response(payload)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_cacheable_id(self) -> Optional[int]:
+        """The id of the requested retrospective if its rendered JSON may come from the board cache."""
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if not isinstance(self.request.accepted_renderer, JSONRenderer) or not str(lookup).isdigit():
+            return None
+        return int(lookup)
+
+    def get_payload_variant(self) -> str:
+        # ?fields=, ?omit=, ?expand= and the renderer change the body, so they are part of ETag and cache key
+        return hashlib.sha256(
+            f"{self.request.META.get('QUERY_STRING', '')}|{self.request.accepted_media_type}".encode()
+        ).hexdigest()[:16]
+
+    def get_board_version(self, retrospective: Retrospective, variant: str) -> Tuple[str, int]:
+        """Strong ETag and Last-Modified timestamp of the retrospective as requested."""
+        updated_at = retrospective.updated_at
+        etag = f'"{retrospective.revision}-{int(updated_at.timestamp() * 1000000)}-{variant}"'
+        return etag, int(updated_at.timestamp())
+
+    def payload_response(self, payload: dict) -> HttpResponse:
+        """Answer with a rendered payload of the board cache, or 304 if the client has it already."""
+        response = get_conditional_response(
+            self.request, etag=payload['etag'], last_modified=payload['last_modified']
+        )
+        if response is None:
+            response = HttpResponse(payload['content'], content_type=payload['content_type'])
+        response['ETag'] = payload['etag']
+        response['Last-Modified'] = http_date(payload['last_modified'])
+        return response
     
     def perform_create(self, serializer):
         # Handle case where user might not be authenticated
@@ -122,6 +315,82 @@ class RetrospectiveViewSet(viewsets.ModelViewSet):
         retrospective.save()
         return Response({'message': 'Retrospective archived'})
     
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        """Items and action items written after revision ?since=, and the ids of those deleted since.
+
+        Start from the revision of the full retrospective and pass the returned
+        revision as ?since= on the next poll.
+        """
+        since = self.get_since_revision()
+        retrospective = self.get_object()
+        # Rows written after the revision was read are left for the next poll
+        revisions = {'revision__gt': since, 'revision__lte': retrospective.revision}
+
+        items = retrospective.items.filter(**revisions).select_related('author').order_by('revision', 'id')
+        action_items = (
+            retrospective.action_items.filter(**revisions).select_related('assigned_to').order_by('revision', 'id')
+        )
+        deleted = {'items': [], 'action_items': []}
+        for kind, object_id in retrospective.deleted_rows.filter(**revisions).order_by('revision', 'id').values_list(
+            'kind', 'object_id'
+        ):
+            deleted['items' if kind == 'item' else 'action_items'].append(object_id)
+
+        return Response({
+            'revision': retrospective.revision,
+            'items': RetrospectiveItemSerializer(items, many=True).data,
+            'action_items': ActionItemSerializer(action_items, many=True).data,
+            'deleted': deleted,
+        })
+
+    def get_since_revision(self) -> int:
+        value = self.request.query_params.get('since')
+        if value is None:
+            raise ValidationError({'since': 'This query parameter is required.'})
+        try:
+            since = int(value)
+        except ValueError:
+            raise ValidationError({'since': 'Must be an integer.'})
+        if since < 0:
+            raise ValidationError({'since': 'Must not be negative.'})
+        return since
+
+    def get_flag(self, name: str) -> bool:
+        """?<name>=true, or "<name>": true in the body."""
+        value = self.request.query_params.get(name)
+        if value is None and isinstance(self.request.data, dict):
+            value = self.request.data.get(name)
+        return str(value).lower() in TRUTHY_QUERY_VALUES
+
+    def force_regeneration(self) -> bool:
+        """?force=true (or "force": true in the body) skips cached action items."""
+        return self.get_flag('force')
+
+    @action(detail=True, methods=['post'])
+    def cluster(self, request, pk=None):
+        """Cluster all retrospective items and save their cluster ids."""
+        retrospective = self.get_object()
+        engine = request.data.get('engine') or request.query_params.get('engine', DEFAULT_CLUSTERING_ENGINE)
+
+        try:
+            cluster_counts = ClusteringService(engine=engine).cluster_retrospective(retrospective.id)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to cluster retrospective items: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({
+            'message': f'Clustered {sum(sum(counts.values()) for counts in cluster_counts.values())} items',
+            'clusters': cluster_counts
+        })
+
     @action(detail=True, methods=['post'])
     def generate_action_items(self, request, pk=None):
         """Generate action items using AI based on retrospective items."""
@@ -134,59 +403,206 @@ class RetrospectiveViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Get the user who initiated the request (if authenticated)
+        user = request.user if hasattr(request, 'user') and request.user.is_authenticated else None
+
+        # Generation runs in the background; the client polls or streams the job for the result
         try:
-            # Initialize GenAI service
-            genai_service = GenAIService()
-            
-            # Get the user who initiated the request (if authenticated)
-            user = request.user if hasattr(request, 'user') and request.user.is_authenticated else None
-            
-            # Generate and create retrospective items (which will include action items)
-            created_items = genai_service.create_retrospective_items_from_ai(
-                retrospective_id=retrospective.id
+            job = enqueue_genai_job(
+                retrospective.id, requested_by=user, force=self.force_regeneration(), stream=self.get_flag('stream')
             )
-            
-            # Filter for action items only
-            action_items = [item for item in created_items if item.category == 'actions']
-            
-            # Serialize the created action items
-            serializer = RetrospectiveItemSerializer(action_items, many=True)
-            
-            return Response({
-                'message': f'Successfully generated {len(action_items)} action items',
-                'action_items': serializer.data
-            }, status=status.HTTP_201_CREATED)
-            
-        except ValueError as e:
+        except GenAIQueueFull as e:
             return Response(
                 {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        except Exception as e:
-            return Response(
-                {'error': f'Failed to generate action items: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
 
+        return Response({
+            'message': 'Action item generation started',
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse('genaijob-detail', kwargs={'pk': job.id}, request=request),
+            'stream_url': reverse('genaijob-stream', kwargs={'pk': job.id}, request=request),
+        }, status=status.HTTP_202_ACCEPTED)
+
 
-class RetrospectiveItemViewSet(viewsets.ModelViewSet):
+class RetrospectiveItemViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     queryset = RetrospectiveItem.objects.all()
     serializer_class = RetrospectiveItemSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = CreatedAtCursorPagination
     
+    def create(self, request, *args, **kwargs):
+        # ?similar=<k> also returns the k most similar existing cards so duplicates can be merged
+        top_k = self.get_similar_items_count()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        data = serializer.data
+
+        if top_k:
+            try:
+                similar_items = ClusteringService().find_similar_items(serializer.instance, top_k)
+                data = {**data, 'similar_items': [
+                    {
+                        'id': similar_item.id,
+                        'category': similar_item.category,
+                        'content': similar_item.content,
+                        'cluster_id': similar_item.cluster_id,
+                        'similarity': round(similarity, 4),
+                    }
+                    for similar_item, similarity in similar_items
+                ]}
+            except Exception as e:
+                logger.error(f"Failed to find similar items for item {serializer.instance.id}: {e}")
+
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def get_similar_items_count(self) -> int:
+        value = self.request.query_params.get('similar')
+        if value is None:
+            return 0
+        try:
+            top_k = int(value)
+        except ValueError:
+            raise ValidationError({'similar': 'Must be an integer.'})
+        if top_k < 0:
+            raise ValidationError({'similar': 'Must not be negative.'})
+        return min(top_k, MAX_SIMILAR_ITEMS)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create, update and delete many items in one transaction.
+
+        Body: {"create": [item, ...], "update": [{"id": ..., <changed fields>}, ...], "delete": [id, ...]}.
+        Updates may change the position, category and cluster_id of an item.
+        """
+        data = request.data if isinstance(request.data, dict) else {}
+        operations = [data.get(key) or [] for key in ('create', 'update', 'delete')]
+        if sum(len(operation) for operation in operations if isinstance(operation, list)) > MAX_BULK_OPERATIONS:
+            raise ValidationError({'non_field_errors': f'At most {MAX_BULK_OPERATIONS} operations per request.'})
+        creates, updates, deletes = operations
+
+        create_serializer = RetrospectiveItemSerializer(data=creates, many=True)
+        update_serializer = RetrospectiveItemBulkUpdateSerializer(data=updates, many=True)
+        errors = {}
+        if not create_serializer.is_valid():
+            errors['create'] = create_serializer.errors
+        if not update_serializer.is_valid():
+            errors['update'] = update_serializer.errors
+        try:
+            delete_ids = serializers.ListField(child=serializers.IntegerField()).run_validation(deletes)
+        except ValidationError as e:
+            errors['delete'] = e.detail
+        if errors:
+            raise ValidationError(errors)
+
+        update_ids = [attrs['id'] for attrs in update_serializer.validated_data]
+        if len(set(update_ids)) != len(update_ids):
+            raise ValidationError({'update': 'Every item can only be updated once per request.'})
+        if set(update_ids) & set(delete_ids):
+            raise ValidationError({'update': 'Items can not be updated and deleted in the same request.'})
+
+        user = request.user if request.user.is_authenticated else None
+        with transaction.atomic():
+            instances = RetrospectiveItem.objects.select_related('author').in_bulk(update_ids)
+            missing = set(update_ids) - set(instances)
+            if missing:
+                raise ValidationError({'update': f"Unknown item id(s): {', '.join(map(str, sorted(missing)))}"})
+            # bulk_update skips the pre_save signal, so stale centroids are dropped here
+            reclustered = {
+                instances[attrs['id']].retrospective_id
+                for attrs in update_serializer.validated_data
+                if {'category', 'cluster_id'} & set(attrs)
+            }
+
+            created = create_serializer.save(author=user) if user else create_serializer.save()
+            update_serializer.instance = instances
+            updated = update_serializer.save()
+            deleted, _ = RetrospectiveItem.objects.filter(id__in=delete_ids).delete()
+
+        for retrospective_id in reclustered:
+            centroid_cache.forget(retrospective_id)
+        # Deletes are broadcast by the post_delete signal
+        broadcast_items_bulk(created=created, updated=updated)
+
+        return Response({
+            'created': RetrospectiveItemSerializer(created, many=True).data,
+            'updated': RetrospectiveItemSerializer(updated, many=True).data,
+            'deleted': deleted,
+        })
+
+    @action(detail=True, methods=['patch'])
+    def position(self, request, pk=None):
+        """Save a dragged card's coordinates without loading it, answering 204 without a body."""
+        serializer = ItemPositionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            item_id = int(pk)
+        except ValueError:
+            item_id = None
+        if item_id is None or not position_coalescer.submit(item_id, dict(serializer.validated_data)):
+            return Response(
+                {'error': 'Retrospective item not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def filter_queryset(self, queryset):
+        """Filter the list by ?retrospective=, ?category=, ?author=, ?cluster_id= and ?created_after=."""
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+
+        params = self.request.query_params
+        for param, lookup in ITEM_INTEGER_FILTERS.items():
+            value = params.get(param)
+            if value is None:
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: int(value)})
+            except ValueError:
+                raise ValidationError({param: 'Must be an integer.'})
+
+        if 'category' in params:
+            queryset = queryset.filter(category=params['category'])
+
+        if 'created_after' in params:
+            try:
+                created_after = parse_datetime(params['created_after'])
+            except ValueError:
+                created_after = None
+            if created_after is None:
+                raise ValidationError({'created_after': 'Must be an ISO 8601 date and time.'})
+            if timezone.is_naive(created_after):
+                created_after = timezone.make_aware(created_after)
+            queryset = queryset.filter(created_at__gt=created_after)
+
+        return queryset
+
     def perform_create(self, serializer):
         # Handle case where user might not be authenticated
         if hasattr(self.request, 'user') and self.request.user.is_authenticated:
-            serializer.save(author=self.request.user)
+            item = serializer.save(author=self.request.user)
         else:
             # For development, create without author (you can set this later)
-            serializer.save()
+            item = serializer.save()
+
+        # ?cluster=true assigns the new card to the nearest existing cluster
+        if self.request.query_params.get('cluster', '').lower() in TRUTHY_QUERY_VALUES:
+            try:
+                ClusteringService().assign_item_cluster(item)
+            except Exception as e:
+                logger.error(f"Failed to assign cluster to item {item.id}: {e}")
 
 
-class ActionItemViewSet(viewsets.ModelViewSet):
+class ActionItemViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     queryset = ActionItem.objects.all()
     serializer_class = ActionItemSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = CreatedAtCursorPagination
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
@@ -209,4 +625,57 @@ class ActionItemViewSet(viewsets.ModelViewSet):
             return Response(
                 {'error': 'User not found'}, 
                 status=status.HTTP_404_NOT_FOUND
-            ) 
\ No newline at end of file
+            ) 
+
+
+class GenAIJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = GenAIJob.objects.all().order_by('-created_at')
+    serializer_class = GenAIJobSerializer
+    permission_classes = [permissions.AllowAny]
+
+    @action(detail=True, methods=['get'], renderer_classes=[EventStreamRenderer, JSONRenderer])
+    def stream(self, request, pk=None):
+        """Follow a job over Server-Sent Events: one event per action item as it is saved, then done or error.
+
+        Only reads the job, so an EventSource reconnecting after a dropped
+        connection just resumes after the Last-Event-ID it sends. The events
+        are an async generator: under ASGI each one is sent as soon as it is
+        read and waiting between polls holds no worker thread.
+        """
+        job = self.get_object()
+        last_event_id = request.META.get('HTTP_LAST_EVENT_ID', '')
+        sent = int(last_event_id) if last_event_id.isdigit() else 0
+        deadline = (job.started_at or job.created_at) + timedelta(seconds=settings.GENAI_JOB_TIMEOUT)
+
+        def read_job():
+            return GenAIJob.objects.filter(pk=job.pk).values('status', 'result', 'error').first()
+
+        async def events():
+            nonlocal sent
+            # Comment line so the client sees the connection open straight away
+            yield ': waiting\n\n'
+            while True:
+                current = await sync_to_async(read_job)()
+                if current is None:
+                    yield format_sse_event('error', {'error': 'The job was deleted'})
+                    return
+                action_items = (current['result'] or {}).get('action_items', [])
+                for index in range(sent, len(action_items)):
+                    yield format_sse_event('item', action_items[index], event_id=index + 1)
+                sent = max(sent, len(action_items))
+
+                if current['status'] == 'succeeded':
+                    yield format_sse_event('done', {'message': current['result']['message'], 'count': sent})
+                    return
+                if current['status'] == 'failed':
+                    yield format_sse_event('error', {'error': f"Failed to generate action items: {current['error']}"})
+                    return
+                if timezone.now() > deadline:
+                    yield format_sse_event('error', {'error': 'Timed out waiting for action items'})
+                    return
+                await asyncio.sleep(JOB_STREAM_POLL_INTERVAL)
+
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Benchmark the clustering engines on synthetic boards.
+
+Boards are groups of noisy unit vectors around random "topic" directions in
+the embedding dimension of the default sentence transformer, so latency and
+quality (adjusted Rand index against the true topics) can be compared without
+loading a model. The default sizes cover a make_demo_data.py category (~25
+cards), a whole demo board (~70 cards) and boards up to 10k cards.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.schemas import DEFAULT_CLUSTER_EPS
+from api.services.clustering_engines import CLUSTERING_ENGINES, get_clustering_engine
+
+EMBEDDING_DIMENSIONS = 384  # all-MiniLM-L6-v2
+DEFAULT_SIZES = [25, 70, 1000, 10000]
+DEFAULT_NOISE = 0.05
+# Agglomerative clustering needs O(n²) memory
+MAX_AGGLOMERATIVE_SIZE = 5000
+
+
+def make_board(n_cards: int, noise: float, seed: int = 0):
+    """Return normalized card vectors and their true topic labels."""
+    rng = np.random.default_rng(seed)
+    n_topics = max(2, int(np.sqrt(n_cards)))
+    topics = rng.normal(size=(n_topics, EMBEDDING_DIMENSIONS))
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+
+    labels = rng.integers(0, n_topics, size=n_cards)
+    vectors = topics[labels] + rng.normal(scale=noise, size=(n_cards, EMBEDDING_DIMENSIONS))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32), labels
+
+
+def benchmark(sizes, engines, threshold: float, noise: float, repeats: int) -> None:
+    print(f"{'cards':>7} {'engine':>14} {'seconds':>9} {'clusters':>9} {'topics':>7} {'ARI':>6}")
+    for n_cards in sizes:
+        vectors, true_labels = make_board(n_cards, noise)
+        for name in engines:
+            if name == 'agglomerative' and n_cards > MAX_AGGLOMERATIVE_SIZE:
+                print(f"{n_cards:>7} {name:>14} {'skipped (O(n²) memory)':>34}")
+                continue
+
+            engine = get_clustering_engine(name, threshold=threshold)
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                labels = engine.fit_predict(vectors)
+                timings.append(time.perf_counter() - started)
+
+            print(
+                f"{n_cards:>7} {name:>14} {min(timings):>9.4f} {len(set(labels)):>9} "
+                f"{len(set(true_labels)):>7} {adjusted_rand_score(true_labels, labels):>6.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Board sizes in cards')
+    parser.add_argument(
+        '--engines', nargs='+', choices=sorted(CLUSTERING_ENGINES), default=sorted(CLUSTERING_ENGINES)
+    )
+    parser.add_argument('--threshold', type=float, default=DEFAULT_CLUSTER_EPS, help='Distance threshold')
+    parser.add_argument(
+        '--noise', type=float, default=DEFAULT_NOISE, help='Per-dimension noise around each topic direction'
+    )
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per measurement (the fastest is reported)')
+    args = parser.parse_args()
+
+    benchmark(args.sizes, args.engines, args.threshold, args.noise, args.repeats)
@@ -1,3 +1,6 @@
+import hashlib
+
+import numpy as np
 import pytest
 
 
@@ -52,3 +55,67 @@ def authenticated_client(api_client, test_user):
     """Return an authenticated API client."""
     api_client.force_authenticate(user=test_user)
     return api_client
+
+
+class FakeTransformer:
+    """Stand-in for a SentenceTransformer that doesn't need model weights."""
+
+    def __init__(self, name):
+        self.name = name
+        self.encoded = []
+
+    def encode(self, contents, **kwargs):
+        self.encoded.extend(contents)
+        vectors = []
+        for content in contents:
+            seed = int(hashlib.sha256(content.encode('utf-8')).hexdigest()[:8], 16)
+            vectors.append(np.random.default_rng(seed).normal(size=8))
+        return np.array(vectors, dtype=np.float32)
+
+
+@pytest.fixture
+def fake_transformer(monkeypatch):
+    """Make every ClusteringService use a single FakeTransformer."""
+    from api.services import cluster_retroitems
+    transformer = FakeTransformer('fake')
+    monkeypatch.setattr(cluster_retroitems, 'get_sentence_transformer', lambda name: transformer)
+    cluster_retroitems.centroid_cache.clear()
+    yield transformer
+    cluster_retroitems.centroid_cache.clear()
+
+
+@pytest.fixture
+def retrospective(test_user):
+    """Create a retrospective with a few items."""
+    from api.models import Retrospective, RetrospectiveItem
+    retrospective = Retrospective.objects.create(title='Service Retrospective', created_by=test_user)
+    for category, content in [
+        ('start', 'Start pairing on reviews'),
+        ('start', 'Start writing more tests'),
+        ('stop', 'Stop meetings without agendas'),
+    ]:
+        RetrospectiveItem.objects.create(
+            retrospective=retrospective, category=category, content=content, author=test_user
+        )
+    return retrospective
+
+
+@pytest.fixture(autouse=True)
+def clear_genai_caches():
+    """Don't let cached LLM results leak between tests."""
+    from api.services.prompt_cache import prompt_result_cache
+    prompt_result_cache.clear()
+    yield
+    prompt_result_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_board_caches():
+    """Ids are reused between tests, so don't let cached boards or payloads leak."""
+    from api.services.board_cache import board_payload_cache
+    from api.services.board_events import item_retrospectives
+    item_retrospectives.clear()
+    board_payload_cache.clear()
+    yield
+    item_retrospectives.clear()
+    board_payload_cache.clear()
@@ -2,6 +2,8 @@
 ASGI config for retrospectives project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests are handled by Django, WebSocket connections by the consumers
+in ``api.routing``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +15,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'retrospectives.settings')
 
-application = get_asgi_application() 
\ No newline at end of file
+# Set up Django before the consumers import any models
+django_asgi_application = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from api.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_application,
+    'websocket': AllowedHostsOriginValidator(URLRouter(websocket_urlpatterns)),
+})
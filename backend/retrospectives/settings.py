@@ -23,6 +23,7 @@ ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1,testserver'
 
 # Application definition
 INSTALLED_APPS = [
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -31,6 +32,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'corsheaders',
+    'channels',
     'api',
 ]
 
@@ -64,6 +66,23 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'retrospectives.wsgi.application'
+ASGI_APPLICATION = 'retrospectives.asgi.application'
+
+# Channel layer for real-time board sync. The in-memory layer only reaches clients
+# of the same process; set CHANNEL_REDIS_URL (needs channels_redis) to sync boards
+# across several server processes
+CHANNEL_REDIS_URL = os.environ.get('CHANNEL_REDIS_URL')
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [CHANNEL_REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+    }
 
 # Database
 DATABASES = {
@@ -149,6 +168,56 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Sentence transformers to load at startup (comma separated), e.g. "all-MiniLM-L6-v2"
+SENTENCE_TRANSFORMER_WARMUP = [
+    name.strip() for name in os.environ.get('SENTENCE_TRANSFORMER_WARMUP', '').split(',') if name.strip()
+]
+
+# Seconds before a request to Ollama times out
+OLLAMA_TIMEOUT = float(os.environ.get('OLLAMA_TIMEOUT', '120'))
+
+# Cache of generated action items for unchanged boards (entries, seconds)
+GENAI_CACHE_MAX_ENTRIES = int(os.environ.get('GENAI_CACHE_MAX_ENTRIES', '128'))
+GENAI_CACHE_TTL = float(os.environ.get('GENAI_CACHE_TTL', '3600'))
+
+# Estimated token budget of the user prompt; larger boards are summarized per category first
+GENAI_MAX_PROMPT_TOKENS = int(os.environ.get('GENAI_MAX_PROMPT_TOKENS', '3000'))
+# List one medoid card per cluster (with its size) instead of every card in the prompt
+GENAI_CLUSTER_PROMPTS = os.environ.get('GENAI_CLUSTER_PROMPTS', 'False').lower() == 'true'
+# Concurrent per-category summarization requests
+GENAI_SUMMARY_WORKERS = int(os.environ.get('GENAI_SUMMARY_WORKERS', '4'))
+
+# Background action item generation: concurrent generations and jobs allowed to wait
+GENAI_MAX_WORKERS = int(os.environ.get('GENAI_MAX_WORKERS', '2'))
+GENAI_MAX_PENDING_JOBS = int(os.environ.get('GENAI_MAX_PENDING_JOBS', '20'))
+# Run generation jobs inside the request instead of the thread pool
+GENAI_JOBS_RUN_INLINE = os.environ.get('GENAI_JOBS_RUN_INLINE', 'False').lower() == 'true'
+# Seconds after which an unfinished job counts as lost (e.g. its worker process died) and may be replaced.
+# A generation makes a few Ollama requests, so this defaults to several request timeouts
+GENAI_JOB_TIMEOUT = float(os.environ.get('GENAI_JOB_TIMEOUT', str(OLLAMA_TIMEOUT * 5)))
+
+# Rendered JSON of completed and archived retrospectives. Share it between all server processes with
+# BOARD_CACHE_REDIS_URL (e.g. redis://localhost:6379/1, needs the redis package) or BOARD_CACHE_DIR (files on
+# one host); writes then drop it everywhere and entries are kept for a day. Without either it is kept in each
+# process' memory, and as a write only reaches its own process, for just a minute (BOARD_CACHE_TTL, seconds)
+BOARD_CACHE_REDIS_URL = os.environ.get('BOARD_CACHE_REDIS_URL')
+BOARD_CACHE_DIR = os.environ.get('BOARD_CACHE_DIR')
+if BOARD_CACHE_REDIS_URL:
+    BOARD_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': BOARD_CACHE_REDIS_URL}
+elif BOARD_CACHE_DIR:
+    BOARD_CACHE = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': BOARD_CACHE_DIR}
+else:
+    BOARD_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'boards'}
+BOARD_CACHE_TTL = int(os.environ.get(
+    'BOARD_CACHE_TTL', '86400' if BOARD_CACHE_REDIS_URL or BOARD_CACHE_DIR else '60'
+))
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'boards': {**BOARD_CACHE, 'TIMEOUT': BOARD_CACHE_TTL},
+}
+
 # Custom user model
 AUTH_USER_MODEL = 'api.User'
 
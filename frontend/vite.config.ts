@@ -22,6 +22,10 @@ export default defineConfig({
         changeOrigin: true,
         // Remove the rewrite - keep the /api prefix
       },
+      '/ws': {
+        target: 'ws://localhost:8000',
+        ws: true,
+      },
     },
   },
   build: {